@@ -2,58 +2,236 @@
 Endpoints de la API
 Rutas para recomendaciones, propiedades, comunas, predicción de precios y satisfacción.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import text
-from typing import List
+import asyncio
+import math
+import orjson
+from types import MappingProxyType
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.pool import NullPool
+from sqlalchemy import (
+    text, func, select, insert, bindparam, cast, column, true, values, Numeric, Select, String
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from geoalchemy2 import Geography
+from typing import List, Dict, Optional
 from datetime import datetime
 from loguru import logger
 
-from app.database import get_db
+from app.config import settings
+from app.database import get_db, get_async_db, async_engine
 from app.schemas.schemas import (
     PropiedadCreate, PropiedadResponse,
     ComunaStats, HealthCheck,
     PuntosInteresCercanosResponse, PuntoInteresResponse
 )
-from app.schemas.schemas_ml import PreferenciasDetalladas, RecomendacionesResponseML
+from app.schemas.schemas_ml import (
+    PreferenciasDetalladas, RecomendacionesResponseML, RECOMENDACIONES_ADAPTER
+)
 from app.schemas.schemas_prediccion import (
     PrediccionRequest, PrediccionResponse, ModeloInfo
 )
 from app.schemas.schemas_satisfaccion import (
     SatisfaccionRequest, SatisfaccionResponse, 
     ComparacionRequest, ComparacionResponse,
-    ModeloSatisfaccionInfo, PropiedadRanking
+    ModeloSatisfaccionInfo
 )
 from app.models.models import Propiedad, Comuna, PuntoInteres
 from app.services.recommendation_ml_service import RecommendationMLService
-from app.services.ml_prediccion_service import MLPrediccionService
+from app.services.ml_prediccion_service import get_ml_prediccion_service
 from app.services.satisfaccion_service import get_satisfaccion_service
+from app.utils.cache import (
+    cache_json, cache_delete, respuesta_json, LRUCache,
+    CACHE_KEY_COMUNAS, CACHE_KEY_COMUNA, CACHE_KEY_STATS
+)
 
-# Router principal
-router = APIRouter()
+# Router principal (respuestas serializadas con orjson)
+router = APIRouter(default_response_class=ORJSONResponse)
 
 # Instanciar servicio de predicción ML (singleton)
-try:
-    ml_prediccion_service = MLPrediccionService()
-except Exception as e:
-    logger.warning(f"⚠️  No se pudo inicializar MLPrediccionService: {e}")
-    ml_prediccion_service = None
+ml_prediccion_service = get_ml_prediccion_service()
 
 # Instanciar servicio de satisfacción (singleton)
 satisfaccion_service = get_satisfaccion_service()
 
+# Instanciar servicio de recomendaciones ML (singleton, la sesión se pasa por solicitud)
+ml_rec_service = RecommendationMLService()
+
+
+# Sentencias constantes de rutas frecuentes (se construyen una sola vez)
+_HEALTH_PING = text("SELECT 1")
+_HEALTH_DB_TIMEOUT = 0.5  # segundos
+_SELECT_COMUNAS_STATS = select(
+    Comuna.nombre,
+    Comuna.total_propiedades,
+    Comuna.precio_promedio,
+    Comuna.precio_m2_promedio
+)
+# Estimación de filas de propiedades + conteo de comunas en un solo round-trip
+_CONTEOS_GENERALES = text(
+    "SELECT "
+    "(SELECT reltuples::bigint FROM pg_class WHERE relname = 'propiedades'), "
+    "(SELECT COUNT(*) FROM comunas)"
+)
+_COUNT_PROPIEDADES = select(func.count()).select_from(Propiedad)
+
+# Punto de referencia con parámetros enlazados (:lon, :lat), en geometry y geography
+_PUNTO_REFERENCIA_GEOM = func.ST_SetSRID(
+    func.ST_MakePoint(bindparam('lon'), bindparam('lat')), 4326
+)
+_PUNTO_REFERENCIA = cast(_PUNTO_REFERENCIA_GEOM, Geography)
+
+# Metros por grado de latitud; margen para cubrir la diferencia esfera/esferoide
+_METROS_POR_GRADO = 111_320
+_MARGEN_BBOX = 1.01
+
+# Grilla del caché de /puntos-interes/cercanos: 1e-4° (~11 m). Las consultas
+# se resuelven desde el centro de la celda, así que el pan/zoom del mapa dentro
+# de ella reutiliza la respuesta; las distancias pueden diferir hasta ~8 m de
+# las medidas desde el punto exacto (menos que el error típico de geocodificación)
+_CELDAS_POI_POR_GRADO = 10_000
+# Radio máximo de búsqueda en metros (acota el BBox y las claves del caché)
+_RADIO_POI_MAX = 10_000
+
+# Tipos de punto de interés agrupados en /puntos-interes/cercanos -> campo de la respuesta
+_CAMPOS_POI = MappingProxyType({
+    'metro': 'metros',
+    'colegio': 'colegios',
+    'universidad': 'universidades',
+    'centro_medico': 'centros_medicos',
+    'supermercado': 'supermercados',
+    'parque': 'parques',
+    'farmacia': 'farmacias',
+    'comisaria': 'comisarias',
+    'bombero': 'bomberos',
+    'banco': 'bancos',
+    'restaurante': 'restaurantes',
+    'correo': 'correos',
+    'gasolinera': 'gasolineras',
+    'cajero': 'cajeros',
+    'otro_servicio': 'otros_servicios',
+    'otro_comercio': 'otros_comercios'
+})
+
+# Columnas de PuntoInteresResponse (proyección sin geometrías)
+_SELECT_POI_COLUMNAS = select(
+    PuntoInteres.id,
+    PuntoInteres.tipo,
+    PuntoInteres.nombre,
+    PuntoInteres.latitud,
+    PuntoInteres.longitud,
+    PuntoInteres.direccion
+)
+
+# POIs dentro del radio, con la distancia ya redondeada en SQL (se calcula
+# una sola vez por fila y se reutiliza para ordenar)
+_SELECT_POI_EN_RADIO = _SELECT_POI_COLUMNAS.add_columns(
+    func.round(
+        cast(func.ST_Distance(PuntoInteres.geog, _PUNTO_REFERENCIA), Numeric), 1
+    ).label('distancia')
+).where(
+    # Prefiltro barato por BBox en grados (índice GiST de geometria, operador &&)
+    PuntoInteres.geometria.op('&&')(
+        func.ST_Expand(_PUNTO_REFERENCIA_GEOM, bindparam('dx'), bindparam('dy'))
+    ),
+    # Filtro preciso en metros sobre geography
+    func.ST_DWithin(PuntoInteres.geog, _PUNTO_REFERENCIA, bindparam('radio'))
+)
+_POI_EN_RADIO = _SELECT_POI_EN_RADIO.subquery('poi')
+
+# Variante top-k por tipo: por cada tipo, KNN (`<->`, recorre el índice GiST
+# de geog en orden de distancia) con LIMIT dentro de un LATERAL
+_TIPOS_POI = values(column('tipo', String), name='t').data([(tipo,) for tipo in _CAMPOS_POI])
+_POI_KNN = (
+    _SELECT_POI_EN_RADIO
+    .where(PuntoInteres.tipo == _TIPOS_POI.c.tipo)
+    .order_by(PuntoInteres.geog.op('<->')(_PUNTO_REFERENCIA))
+    .limit(bindparam('limite'))
+    .lateral('poi')
+)
+
+
+def _agrupar_poi_por_tipo(poi) -> Select:
+    """
+    Agrupa en Postgres las filas `poi` por tipo: una fila con un arreglo JSON
+    por tipo, ordenado por distancia (cada fila se serializa tal cual)
+    """
+    return select(*(
+        func.json_agg(aggregate_order_by(poi.table_valued(), poi.c.distancia))
+        .filter(poi.c.tipo == tipo)
+        .label(campo)
+        for tipo, campo in _CAMPOS_POI.items()
+    ))
+
+
+_SELECT_POI_CERCANOS = _agrupar_poi_por_tipo(_POI_EN_RADIO)
+_SELECT_POI_CERCANOS_KNN = _agrupar_poi_por_tipo(_POI_KNN).select_from(
+    _TIPOS_POI.join(_POI_KNN, true())
+)
+
+# Respuestas de /puntos-interes/cercanos por (lat, lon) cuantizadas y radio;
+# los POIs se cargan por scripts y cambian muy poco (TTL como invalidación)
+_CACHE_POI_CERCANOS = LRUCache(maxsize=settings.POI_CACHE_SIZE, ttl=settings.POI_CACHE_TTL)
+
+# Normalización de nombres de comuna (claves en minúsculas / casefold)
+_COMUNA_MAP = MappingProxyType({
+    "nunoa": "Ñuñoa",
+    "nñuoa": "Ñuñoa",
+    "ñuñoa": "Ñuñoa",
+    "santiago": "Santiago",
+    "la_reina": "La Reina",
+    "la reina": "La Reina",
+    "estacion_central": "Estación Central",
+    "estacion central": "Estación Central"
+})
+
+# Caché en memoria del proceso: nombre de comuna -> id
+_COMUNA_IDS: Dict[str, int] = {}
+
+
+async def _comuna_id(db: AsyncSession, nombre: str) -> int:
+    """
+    Resuelve nombre de comuna -> id con caché en memoria del proceso.
+    
+    Las comunas casi no cambian; si se modifican, llamar a `_COMUNA_IDS.clear()`.
+    Lanza LookupError si la comuna no existe (los errores no quedan cacheados).
+    """
+    comuna_id = _COMUNA_IDS.get(nombre)
+    if comuna_id is None:
+        comuna_id = await db.scalar(select(Comuna.id).where(Comuna.nombre == nombre))
+        if comuna_id is None:
+            raise LookupError(nombre)
+        _COMUNA_IDS[nombre] = comuna_id
+    
+    return comuna_id
+
 
 # ============================================================================
 # HEALTH CHECK
 # ============================================================================
 
+async def _ping_db() -> None:
+    """Ejecuta SELECT 1 en una conexión directa del engine (sin sesión ORM)"""
+    async with async_engine.connect() as conn:
+        await conn.execute(_HEALTH_PING)
+
+
 @router.get("/health", response_model=HealthCheck, tags=["Sistema"])
-def health_check(db: Session = Depends(get_db)):
-    """Health check del sistema"""
+async def health_check():
+    """
+    Health check del sistema (readiness)
+    
+    Usa una conexión del engine solo durante el SELECT 1 y con timeout,
+    para no retener conexiones del pool mientras el balanceador sondea.
+    """
     try:
         # Test DB
-        db.execute(text("SELECT 1"))
+        await asyncio.wait_for(_ping_db(), timeout=_HEALTH_DB_TIMEOUT)
         db_status = "✅ Conectada"
+    except asyncio.TimeoutError:
+        db_status = f"❌ Error: timeout ({_HEALTH_DB_TIMEOUT}s)"
     except Exception as e:
         db_status = f"❌ Error: {str(e)}"
     
@@ -69,14 +247,32 @@ def health_check(db: Session = Depends(get_db)):
     )
 
 
+@router.get("/health/live", tags=["Sistema"])
+async def liveness_check():
+    """Liveness: estado del pool de conexiones sin ejecutar consultas"""
+    pool = async_engine.pool
+    if isinstance(pool, NullPool):
+        # Conexiones agrupadas en PgBouncer: no hay pool local que reportar
+        return {"status": "alive", "pool": {"tipo": "pgbouncer"}}
+    
+    return {
+        "status": "alive",
+        "pool": {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow()
+        }
+    }
+
+
 # ============================================================================
 # PROPIEDADES
 # ============================================================================
 
 @router.post("/propiedades", response_model=PropiedadResponse, tags=["Propiedades"])
-def crear_propiedad(
+async def crear_propiedad(
     propiedad: PropiedadCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Crea una nueva propiedad en la base de datos
@@ -84,92 +280,178 @@ def crear_propiedad(
     """
     try:
         # Buscar comuna
-        comuna_obj = db.query(Comuna).filter(
-            Comuna.nombre == propiedad.comuna
-        ).first()
-        
-        if not comuna_obj:
+        try:
+            comuna_id = await _comuna_id(db, propiedad.comuna)
+        except LookupError:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Comuna '{propiedad.comuna}' no encontrada"
             )
         
-        # Crear propiedad
-        nueva_propiedad = Propiedad(
-            comuna_id=comuna_obj.id,
+        # Crear propiedad: INSERT ... RETURNING trae id y defaults del servidor
+        # en el mismo round-trip (sin refresh posterior)
+        creada = (await db.execute(
+            insert(Propiedad)
+            .values(**propiedad.model_dump(exclude={'comuna'}), comuna_id=comuna_id)
+            .returning(Propiedad.id, Propiedad.created_at, Propiedad.precio_predicho)
+        )).one()
+        await db.commit()
+        
+        # Invalidar estadísticas cacheadas
+        await cache_delete(
+            CACHE_KEY_COMUNAS,
+            CACHE_KEY_COMUNA.format(nombre=propiedad.comuna),
+            CACHE_KEY_STATS
+        )
+        
+        logger.info("✅ Propiedad creada: ID {}", creada.id)
+        
+        # Construir respuesta (datos ya validados por PropiedadCreate y la BD)
+        return PropiedadResponse.model_construct(
+            id=creada.id,
+            comuna=propiedad.comuna,
             direccion=propiedad.direccion,
-            latitud=propiedad.latitud,
-            longitud=propiedad.longitud,
             superficie_total=propiedad.superficie_total,
-            superficie_construida=propiedad.superficie_construida,
             dormitorios=propiedad.dormitorios,
             banos=propiedad.banos,
-            estacionamientos=propiedad.estacionamientos,
-            dist_metro=propiedad.dist_metro,
-            dist_supermercado=propiedad.dist_supermercado,
-            dist_area_verde=propiedad.dist_area_verde,
-            dist_colegio=propiedad.dist_colegio,
-            dist_hospital=propiedad.dist_hospital,
-            dist_mall=propiedad.dist_mall,
             precio=propiedad.precio,
-            fuente=propiedad.fuente,
-            descripcion=propiedad.descripcion
+            precio_predicho=creada.precio_predicho,
+            created_at=creada.created_at
         )
         
-        db.add(nueva_propiedad)
-        db.commit()
-        db.refresh(nueva_propiedad)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("❌ Error creando propiedad: {}", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al crear propiedad: {str(e)}"
+        )
+
+
+# Máximo de propiedades por solicitud de carga masiva
+_MAX_PROPIEDADES_BULK = 1000
+
+
+@router.post("/propiedades/bulk", tags=["Propiedades"])
+async def crear_propiedades_bulk(
+    propiedades: List[PropiedadCreate],
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Crea varias propiedades en una sola transacción (carga masiva)
+    
+    Resuelve todas las comunas en una consulta y hace un INSERT multi-fila
+    con RETURNING id. Si alguna comuna no existe no se inserta nada.
+    """
+    if not propiedades:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La lista de propiedades está vacía"
+        )
+    if len(propiedades) > _MAX_PROPIEDADES_BULK:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Máximo {_MAX_PROPIEDADES_BULK} propiedades por solicitud"
+        )
+    
+    try:
+        # Resolver todas las comunas en una sola consulta
+        nombres = {p.comuna for p in propiedades}
+        comuna_ids = dict((await db.execute(
+            select(Comuna.nombre, Comuna.id).where(Comuna.nombre.in_(nombres))
+        )).all())
+        
+        faltantes = nombres - comuna_ids.keys()
+        if faltantes:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Comunas no encontradas: {', '.join(sorted(faltantes))}"
+            )
+        
+        filas = [
+            {**p.model_dump(exclude={'comuna'}), 'comuna_id': comuna_ids[p.comuna]}
+            for p in propiedades
+        ]
         
-        logger.info(f"✅ Propiedad creada: ID {nueva_propiedad.id}")
+        ids = (await db.scalars(
+            insert(Propiedad).returning(Propiedad.id, sort_by_parameter_order=True),
+            filas
+        )).all()
+        await db.commit()
         
-        # Construir respuesta
-        return PropiedadResponse(
-            id=nueva_propiedad.id,
-            comuna=propiedad.comuna,
-            direccion=nueva_propiedad.direccion,
-            superficie_total=nueva_propiedad.superficie_total,
-            dormitorios=nueva_propiedad.dormitorios,
-            banos=nueva_propiedad.banos,
-            precio=nueva_propiedad.precio,
-            precio_predicho=nueva_propiedad.precio_predicho,
-            created_at=nueva_propiedad.created_at
+        # Invalidar estadísticas cacheadas
+        await cache_delete(
+            CACHE_KEY_COMUNAS,
+            CACHE_KEY_STATS,
+            *(CACHE_KEY_COMUNA.format(nombre=nombre) for nombre in nombres)
         )
         
+        logger.info("✅ Carga masiva: {} propiedades creadas", len(ids))
+        
+        return {
+            "total_creadas": len(ids),
+            "ids": ids
+        }
+        
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Error creando propiedad: {e}")
+        await db.rollback()
+        logger.error("❌ Error en carga masiva de propiedades: {}", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al crear propiedad: {str(e)}"
+            detail=f"Error al crear propiedades: {str(e)}"
         )
 
 
 @router.get("/propiedades", tags=["Propiedades"])
-def listar_propiedades(
-    skip: int = 0,
-    limit: int = 50,
+async def listar_propiedades(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
     comuna: str = None,
-    db: Session = Depends(get_db)
+    after_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Lista propiedades con filtros opcionales"""
-    query = db.query(Propiedad)
+    """
+    Lista propiedades con filtros opcionales
+    
+    Paginación:
+    - `skip`/`limit`: paginación por OFFSET (costosa en páginas profundas)
+    - `after_id`: paginación keyset, retorna propiedades con id > after_id.
+      Usar el `next_after_id` de la respuesta para pedir la siguiente página.
+    """
+    filtros = []
     
     if comuna:
-        comuna_obj = db.query(Comuna).filter(Comuna.nombre == comuna).first()
-        if comuna_obj:
-            query = query.filter(Propiedad.comuna_id == comuna_obj.id)
+        try:
+            filtros.append(Propiedad.comuna_id == await _comuna_id(db, comuna))
+        except LookupError:
+            pass
     
-    total = query.count()
-    propiedades = query.offset(skip).limit(limit).all()
+    # Conteo directo sobre la tabla (evita el COUNT sobre subconsulta de query.count())
+    total = await db.scalar(select(func.count()).select_from(Propiedad).where(*filtros))
+    
+    stmt = (
+        select(Propiedad)
+        .options(selectinload(Propiedad.comuna))
+        .where(*filtros)
+        .order_by(Propiedad.id)
+        .limit(limit)
+    )
+    if after_id is not None:
+        # Keyset: recorre el índice de la PK en vez de descartar `skip` filas
+        stmt = stmt.where(Propiedad.id > after_id)
+    else:
+        stmt = stmt.offset(skip)
+    propiedades = (await db.execute(stmt)).scalars().all()
     
     # Serializar propiedades manualmente para evitar problemas con geometrías
     propiedades_list = []
     for p in propiedades:
-        comuna_nombre = db.query(Comuna.nombre).filter(Comuna.id == p.comuna_id).scalar() if p.comuna_id else None
         propiedades_list.append({
             "id": p.id,
-            "comuna": comuna_nombre,
+            "comuna": p.comuna.nombre if p.comuna else None,
             "direccion": p.direccion,
             "latitud": p.latitud,
             "longitud": p.longitud,
@@ -184,14 +466,61 @@ def listar_propiedades(
     
     return {
         "total": total,
-        "propiedades": propiedades_list
+        "propiedades": propiedades_list,
+        "next_after_id": propiedades[-1].id if len(propiedades) == limit else None
     }
 
 
+# Columnas proyectables con `?fields=` (todas menos la geometría)
+_CAMPOS_PROPIEDAD = frozenset(
+    c.key for c in Propiedad.__table__.columns if c.key != 'geometria'
+)
+
+
 @router.get("/propiedades/{propiedad_id}", tags=["Propiedades"])
-def obtener_propiedad(propiedad_id: int, db: Session = Depends(get_db)):
-    """Obtiene una propiedad por ID"""
-    propiedad = db.query(Propiedad).filter(Propiedad.id == propiedad_id).first()
+async def obtener_propiedad(
+    propiedad_id: int,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Obtiene una propiedad por ID
+    
+    `fields` (opcional): columnas separadas por coma, ej: `?fields=id,precio,direccion`.
+    Solo se seleccionan esas columnas y se retorna un dict plano, sin hidratar el ORM.
+    """
+    if fields is not None:
+        # Sin duplicados, conservando el orden pedido
+        campos = list(dict.fromkeys(f.strip() for f in fields.split(',') if f.strip()))
+        if not campos:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="`fields` debe indicar al menos un campo"
+            )
+        invalidos = [f for f in campos if f not in _CAMPOS_PROPIEDAD]
+        if invalidos:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Campos no válidos: {', '.join(invalidos)}"
+            )
+        
+        fila = (await db.execute(
+            select(*[getattr(Propiedad, f) for f in campos])
+            .where(Propiedad.id == propiedad_id)
+        )).mappings().first()
+        
+        if fila is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Propiedad {propiedad_id} no encontrada"
+            )
+        
+        return dict(fila)
+    
+    propiedad = await db.get(
+        Propiedad, propiedad_id,
+        options=[selectinload(Propiedad.comuna)]
+    )
     
     if not propiedad:
         raise HTTPException(
@@ -206,17 +535,21 @@ def obtener_propiedad(propiedad_id: int, db: Session = Depends(get_db)):
 # COMUNAS
 # ============================================================================
 
+# response_model solo documenta el esquema: cache_json retorna un Response con los
+# bytes ya serializados, que FastAPI entrega sin volver a validar
 @router.get("/comunas", response_model=List[ComunaStats], tags=["Comunas"])
-def listar_comunas(db: Session = Depends(get_db)):
+@cache_json(CACHE_KEY_COMUNAS, ttl=settings.CACHE_TTL_COMUNAS, max_age=settings.HTTP_CACHE_MAX_AGE)
+async def listar_comunas(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Lista todas las comunas con sus estadísticas"""
-    comunas = db.query(Comuna).all()
-    return comunas
+    resultado = await db.execute(_SELECT_COMUNAS_STATS)
+    return [dict(fila) for fila in resultado.mappings()]
 
 
 @router.get("/comunas/{nombre}", tags=["Comunas"])
-def obtener_comuna(nombre: str, db: Session = Depends(get_db)):
+@cache_json(CACHE_KEY_COMUNA, ttl=settings.CACHE_TTL_COMUNAS)
+async def obtener_comuna(nombre: str, db: AsyncSession = Depends(get_async_db)):
     """Obtiene información detallada de una comuna"""
-    comuna = db.query(Comuna).filter(Comuna.nombre == nombre).first()
+    comuna = await db.scalar(select(Comuna).where(Comuna.nombre == nombre))
     
     if not comuna:
         raise HTTPException(
@@ -224,19 +557,25 @@ def obtener_comuna(nombre: str, db: Session = Depends(get_db)):
             detail=f"Comuna '{nombre}' no encontrada"
         )
     
-    # Estadísticas de propiedades
-    propiedades = db.query(Propiedad).filter(Propiedad.comuna_id == comuna.id).all()
-    
-    if propiedades:
-        precios = [p.precio for p in propiedades if p.precio]
-        precio_promedio = sum(precios) / len(precios) if precios else None
-    else:
-        precio_promedio = None
+    # Estadísticas de propiedades (agregadas en SQL, sin hidratar filas)
+    total_propiedades, precio_promedio = (await db.execute(
+        select(
+            func.count(Propiedad.id),
+            func.avg(func.nullif(Propiedad.precio, 0))
+        ).where(Propiedad.comuna_id == comuna.id)
+    )).one()
     
     return {
-        "comuna": comuna,
-        "total_propiedades": len(propiedades),
-        "precio_promedio": precio_promedio
+        "comuna": {
+            "id": comuna.id,
+            "nombre": comuna.nombre,
+            "codigo": comuna.codigo,
+            "precio_promedio": comuna.precio_promedio,
+            "precio_m2_promedio": comuna.precio_m2_promedio,
+            "total_propiedades": comuna.total_propiedades
+        },
+        "total_propiedades": total_propiedades,
+        "precio_promedio": float(precio_promedio) if precio_promedio is not None else None
     }
 
 
@@ -244,11 +583,18 @@ def obtener_comuna(nombre: str, db: Session = Depends(get_db)):
 # ESTADÍSTICAS
 # ============================================================================
 
+# Sobre este número de filas se usa la estimación del planner (pg_class.reltuples)
+# en vez de un COUNT(*) exacto, que en Postgres recorre toda la tabla
+_UMBRAL_CONTEO_EXACTO = 100_000
+
+
 @router.get("/stats/general", tags=["Estadísticas"])
-def estadisticas_generales(db: Session = Depends(get_db)):
-    """Estadísticas generales del sistema"""
-    total_propiedades = db.query(Propiedad).count()
-    total_comunas = db.query(Comuna).count()
+@cache_json(CACHE_KEY_STATS, ttl=settings.CACHE_TTL_STATS)
+async def estadisticas_generales(db: AsyncSession = Depends(get_async_db)):
+    """Estadísticas generales del sistema (conteos aproximados en tablas grandes)"""
+    total_propiedades, total_comunas = (await db.execute(_CONTEOS_GENERALES)).one()
+    if total_propiedades is None or total_propiedades < _UMBRAL_CONTEO_EXACTO:
+        total_propiedades = await db.scalar(_COUNT_PROPIEDADES)
     
     return {
         "total_propiedades": total_propiedades,
@@ -331,23 +677,21 @@ def recomendar_propiedades_ml(
         RecomendacionesResponseML: Recomendaciones con scoring explicado
     """
     try:
-        logger.info(f"🔬 Solicitud recomendaciones ML - Limit: {limit}")
-        logger.info(f"   Preferencias detalladas recibidas")
-        
-        # Crear servicio ML
-        ml_rec_service = RecommendationMLService(db)
+        logger.debug("🔬 Solicitud recomendaciones ML - Limit: {}", limit)
         
-        # Obtener recomendaciones con ML
-        response = ml_rec_service.recomendar_propiedades(preferencias, limit)
+        # Obtener recomendaciones con ML (servicio singleton, sesión por solicitud)
+        response = ml_rec_service.recomendar_propiedades(preferencias, limit, db=db)
         
-        logger.info(f"✅ ML: {response.total_encontradas} recomendaciones de {response.total_analizadas} analizadas")
+        logger.debug(
+            "✅ ML: {} recomendaciones de {} analizadas",
+            response.total_encontradas, response.total_analizadas
+        )
         
-        return response
+        # Serializar directo a bytes (sin jsonable_encoder ni re-validar response_model)
+        return respuesta_json(RECOMENDACIONES_ADAPTER.dump_json(response))
         
     except Exception as e:
-        logger.error(f"❌ Error en recomendaciones ML: {str(e)}")
-        import traceback
-        logger.error(traceback.format_exc())
+        logger.exception("❌ Error en recomendaciones ML: {}", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error generando recomendaciones ML: {str(e)}"
@@ -412,9 +756,11 @@ def predecir_precio(request: PrediccionRequest):
         PrediccionResponse: Precio predicho + confianza + detalles
     """
     try:
-        logger.info(f"🏠 Solicitud predicción de precio")
-        logger.info(f"   Superficie: {request.superficie_util}m², Dorms: {request.dormitorios}, Baños: {request.banos}")
-        logger.info(f"   Ubicación: ({request.latitud}, {request.longitud})")
+        logger.debug(
+            "🏠 Solicitud predicción de precio - Superficie: {}m², Dorms: {}, Baños: {}, Ubicación: ({}, {})",
+            request.superficie_util, request.dormitorios, request.banos,
+            request.latitud, request.longitud
+        )
         
         # Validar que el servicio esté disponible
         if ml_prediccion_service is None:
@@ -436,82 +782,103 @@ def predecir_precio(request: PrediccionRequest):
             usar_stacking=request.usar_stacking
         )
         
-        logger.info(f"✅ Predicción: UF {resultado['precio_m2_predicho']}/m² "
-                   f"(Total: UF {resultado['precio_total_estimado']:,.0f}) "
-                   f"| Confianza: {resultado['confianza']:.2f} "
-                   f"| Método: {resultado['metodo']}")
+        logger.debug(
+            "✅ Predicción: UF {}/m² (Total: UF {:,.0f}) | Confianza: {:.2f} | Método: {}",
+            resultado['precio_m2_predicho'], resultado['precio_total_estimado'],
+            resultado['confianza'], resultado['metodo']
+        )
         
-        return PrediccionResponse(**resultado)
+        # Resultado interno del servicio con la forma de PrediccionResponse: se
+        # serializa directo (response_model queda solo para la documentación)
+        return respuesta_json(orjson.dumps(resultado, option=orjson.OPT_SERIALIZE_NUMPY))
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Error en predicción: {str(e)}")
-        import traceback
-        logger.error(traceback.format_exc())
+        logger.exception("❌ Error en predicción: {}", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al predecir precio: {str(e)}"
         )
 
 
+# Métricas de los modelos (de la documentación de Semana 3), constantes
+_METRICAS_MODELOS = MappingProxyType({
+    "stacking": {
+        "r2": 0.489,
+        "rmse": 25288.0,
+        "mae": 4173.0
+    },
+    "gwrf_cluster": {
+        "r2": 0.039,
+        "rmse": 34677.0,
+        "mae": 4719.0
+    },
+    "rf_global": {
+        "r2": 0.028,
+        "rmse": 34876.0,
+        "mae": 4839.0
+    }
+})
+
+_INFO_MODELO_JSON: Optional[bytes] = None
+
+
+def _info_modelo_json() -> bytes:
+    """
+    Serializa una sola vez la información de modelos.
+    
+    Los modelos se cargan al importar el servicio y no cambian en runtime,
+    por lo que el JSON resultante es constante durante la vida del proceso.
+    """
+    global _INFO_MODELO_JSON
+    
+    if _INFO_MODELO_JSON is None:
+        if ml_prediccion_service is None:
+            info = ModeloInfo(
+                modelos_disponibles={
+                    "stacking": False,
+                    "gwrf_cluster": False,
+                    "gwrf_densidad": False
+                },
+                version="1.0.0"
+            )
+        else:
+            info = ModeloInfo(
+                modelos_disponibles={
+                    "stacking": (
+                        ml_prediccion_service.meta_model is not None
+                        or ml_prediccion_service.stack_onnx is not None
+                    ),
+                    "gwrf_cluster": bool(ml_prediccion_service.modelos_cluster),
+                    "gwrf_densidad": False  # Por ahora no implementado
+                },
+                version="1.0.0",
+                metricas=_METRICAS_MODELOS
+            )
+        _INFO_MODELO_JSON = orjson.dumps(info.model_dump())
+    
+    return _INFO_MODELO_JSON
+
+
 @router.get(
     "/modelo-info",
     response_model=ModeloInfo,
     tags=["Predicción ML"],
     summary="Información sobre modelos ML cargados"
 )
-def obtener_info_modelo():
+def obtener_info_modelo(request: Request):
     """
     Retorna información sobre los modelos ML disponibles.
     
     Útil para verificar qué modelos están cargados y sus métricas.
+    Responde con ETag/Cache-Control (304 si el cliente ya tiene la versión actual).
     """
     try:
-        if ml_prediccion_service is None:
-            return ModeloInfo(
-                modelos_disponibles={
-                    "stacking": False,
-                    "gwrf_cluster": False,
-                    "gwrf_densidad": False
-                },
-                version="1.0.0"
-            )
-        
-        # Verificar qué modelos están disponibles
-        modelos_disponibles = {
-            "stacking": ml_prediccion_service.meta_model is not None,
-            "gwrf_cluster": bool(ml_prediccion_service.modelos_cluster),
-            "gwrf_densidad": False  # Por ahora no implementado
-        }
-        
-        # Métricas de los modelos (de la documentación de Semana 3)
-        metricas = {
-            "stacking": {
-                "r2": 0.489,
-                "rmse": 25288.0,
-                "mae": 4173.0
-            },
-            "gwrf_cluster": {
-                "r2": 0.039,
-                "rmse": 34677.0,
-                "mae": 4719.0
-            },
-            "rf_global": {
-                "r2": 0.028,
-                "rmse": 34876.0,
-                "mae": 4839.0
-            }
-        }
-        
-        return ModeloInfo(
-            modelos_disponibles=modelos_disponibles,
-            version="1.0.0",
-            metricas=metricas
-        )
+        return respuesta_json(_info_modelo_json(), request, settings.HTTP_CACHE_MAX_AGE)
         
     except Exception as e:
-        logger.error(f"❌ Error obteniendo info de modelo: {e}")
+        logger.error("❌ Error obteniendo info de modelo: {}", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al obtener información del modelo: {str(e)}"
@@ -528,11 +895,12 @@ def obtener_info_modelo():
     tags=["Puntos de Interés"],
     summary="Obtiene puntos de interés cercanos a una ubicación"
 )
-def obtener_puntos_interes_cercanos(
+async def obtener_puntos_interes_cercanos(
     latitud: float,
     longitud: float,
-    radio: int = 1500,  # Radio en metros (default 1.5km)
-    db: Session = Depends(get_db)
+    radio: int = Query(1500, gt=0, le=_RADIO_POI_MAX),  # Radio en metros (default 1.5km)
+    limite_por_tipo: Optional[int] = Query(None, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Obtiene todos los puntos de interés cercanos a una ubicación.
@@ -540,7 +908,8 @@ def obtener_puntos_interes_cercanos(
     **Parámetros:**
     - `latitud`: Latitud de la ubicación de referencia
     - `longitud`: Longitud de la ubicación de referencia
-    - `radio`: Radio de búsqueda en metros (default: 1500m = 1.5km)
+    - `radio`: Radio de búsqueda en metros (default: 1500m = 1.5km, máximo 10km)
+    - `limite_por_tipo`: Máximo de puntos por tipo, los más cercanos (opcional, default: todos)
     
     **Retorna:**
     Puntos de interés organizados por tipo:
@@ -553,83 +922,51 @@ def obtener_puntos_interes_cercanos(
     - Comisarías (seguridad)
     - Bomberos
     
-    Cada punto incluye su distancia en metros desde la ubicación consultada.
+    Cada punto incluye su distancia en metros desde la ubicación consultada,
+    medida desde el centro de su celda de ~11 m.
     """
     try:
-        logger.info(f"🔍 Buscando puntos de interés cerca de ({latitud}, {longitud}) - Radio: {radio}m")
+        # Cuantizar coordenadas a la grilla del caché: consultas cercanas
+        # (pan/zoom del mapa) comparten la misma entrada
+        lat_q = round(latitud * _CELDAS_POI_POR_GRADO)
+        lon_q = round(longitud * _CELDAS_POI_POR_GRADO)
+        cache_key = (lat_q, lon_q, radio, limite_por_tipo)
         
-        # Query con ST_DWithin para buscar dentro del radio especificado
-        # ST_DWithin usa metros cuando se trabaja con geography
-        puntos_query = db.query(
-            PuntoInteres,
-            text(f"ST_Distance(geometria::geography, ST_SetSRID(ST_MakePoint({longitud}, {latitud}), 4326)::geography) as distancia")
-        ).filter(
-            text(f"ST_DWithin(geometria::geography, ST_SetSRID(ST_MakePoint({longitud}, {latitud}), 4326)::geography, {radio})")
-        ).all()
+        contenido = _CACHE_POI_CERCANOS.get(cache_key)
+        if contenido is not None:
+            return respuesta_json(contenido)
         
-        # Organizar por tipo
-        puntos_por_tipo = {
-            'metro': [],
-            'colegio': [],
-            'universidad': [],
-            'centro_medico': [],
-            'supermercado': [],
-            'parque': [],
-            'farmacia': [],
-            'comisaria': [],
-            'bombero': [],
-            'banco': [],
-            'restaurante': [],
-            'correo': [],
-            'gasolinera': [],
-            'cajero': [],
-            'otro_servicio': [],
-            'otro_comercio': []
-        }
+        logger.debug("🔍 Buscando puntos de interés cerca de ({}, {}) - Radio: {}m", latitud, longitud, radio)
         
-        for punto, distancia in puntos_query:
-            punto_dict = {
-                'id': punto.id,
-                'tipo': punto.tipo,
-                'nombre': punto.nombre,
-                'latitud': punto.latitud,
-                'longitud': punto.longitud,
-                'direccion': punto.direccion,
-                'distancia': round(distancia, 1)
-            }
-            
-            # Solo agregar tipos que están en el diccionario (ignorar otros)
-            if punto.tipo in puntos_por_tipo:
-                puntos_por_tipo[punto.tipo].append(punto_dict)
+        # BBox en geometry + ST_DWithin sobre la columna geography indexada (GiST);
+        # la agrupación por tipo se hace en SQL (json_agg ... FILTER)
+        lat, lon = lat_q / _CELDAS_POI_POR_GRADO, lon_q / _CELDAS_POI_POR_GRADO
         
-        total = sum(len(v) for v in puntos_por_tipo.values())
+        # Semiejes del BBox en grados (un grado de longitud mide menos lejos del ecuador)
+        dy = radio * _MARGEN_BBOX / _METROS_POR_GRADO
+        dx = dy / max(math.cos(math.radians(lat)), 0.01)
         
-        logger.info(f"✅ Encontrados {total} puntos de interés")
+        params = {'lon': lon, 'lat': lat, 'radio': radio, 'dx': dx, 'dy': dy}
+        if limite_por_tipo is None:
+            fila = (await db.execute(_SELECT_POI_CERCANOS, params)).mappings().one()
+        else:
+            params['limite'] = limite_por_tipo
+            fila = (await db.execute(_SELECT_POI_CERCANOS_KNN, params)).mappings().one()
         
-        return PuntosInteresCercanosResponse(
-            metros=puntos_por_tipo['metro'],
-            colegios=puntos_por_tipo['colegio'],
-            universidades=puntos_por_tipo['universidad'],
-            centros_medicos=puntos_por_tipo['centro_medico'],
-            supermercados=puntos_por_tipo['supermercado'],
-            parques=puntos_por_tipo['parque'],
-            farmacias=puntos_por_tipo['farmacia'],
-            comisarias=puntos_por_tipo['comisaria'],
-            bomberos=puntos_por_tipo['bombero'],
-            bancos=puntos_por_tipo['banco'],
-            restaurantes=puntos_por_tipo['restaurante'],
-            correos=puntos_por_tipo['correo'],
-            gasolineras=puntos_por_tipo['gasolinera'],
-            cajeros=puntos_por_tipo['cajero'],
-            otros_servicios=puntos_por_tipo['otro_servicio'],
-            otros_comercios=puntos_por_tipo['otro_comercio'],
-            total_encontrados=total
-        )
+        puntos_por_campo = {campo: fila[campo] or [] for campo in _CAMPOS_POI.values()}
+        total = sum(len(v) for v in puntos_por_campo.values())
+        
+        logger.debug("✅ Encontrados {} puntos de interés", total)
+        
+        # Filas armadas por Postgres (mismas claves que PuntoInteresResponse):
+        # se serializan directo, sin construir modelos Pydantic por punto
+        contenido = orjson.dumps({**puntos_por_campo, "total_encontrados": total})
+        _CACHE_POI_CERCANOS.set(cache_key, contenido)
+        
+        return respuesta_json(contenido)
         
     except Exception as e:
-        logger.error(f"❌ Error obteniendo puntos de interés: {str(e)}")
-        import traceback
-        logger.error(traceback.format_exc())
+        logger.exception("❌ Error obteniendo puntos de interés: {}", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al obtener puntos de interés: {str(e)}"
@@ -642,9 +979,9 @@ def obtener_puntos_interes_cercanos(
     tags=["Puntos de Interés"],
     summary="Obtiene todos los puntos de interés de un tipo específico"
 )
-def obtener_puntos_por_tipo(
+async def obtener_puntos_por_tipo(
     tipo: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Obtiene todos los puntos de interés de un tipo específico.
@@ -660,22 +997,17 @@ def obtener_puntos_por_tipo(
     - bombero
     """
     try:
-        puntos = db.query(PuntoInteres).filter(PuntoInteres.tipo == tipo).all()
+        # Solo las columnas de la respuesta (sin hidratar objetos ORM ni geometrías)
+        puntos = (await db.execute(
+            _SELECT_POI_COLUMNAS.where(PuntoInteres.tipo == tipo)
+        )).mappings()
         
-        return [
-            PuntoInteresResponse(
-                id=p.id,
-                tipo=p.tipo,
-                nombre=p.nombre,
-                latitud=p.latitud,
-                longitud=p.longitud,
-                direccion=p.direccion
-            )
-            for p in puntos
-        ]
+        # Filas de la BD ya tipadas: se serializan directo, sin validar cada
+        # PuntoInteresResponse (response_model queda solo para la documentación)
+        return respuesta_json(orjson.dumps([dict(p) for p in puntos]))
         
     except Exception as e:
-        logger.error(f"❌ Error obteniendo puntos de tipo {tipo}: {e}")
+        logger.error("❌ Error obteniendo puntos de tipo {}: {}", tipo, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al obtener puntos de tipo {tipo}: {str(e)}"
@@ -722,7 +1054,7 @@ def obtener_info_satisfaccion():
         )
         
     except Exception as e:
-        logger.error(f"❌ Error obteniendo info de satisfacción: {e}")
+        logger.error("❌ Error obteniendo info de satisfacción: {}", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al obtener información del modelo: {str(e)}"
@@ -759,27 +1091,13 @@ def predecir_satisfaccion_endpoint(request: SatisfaccionRequest):
             )
         
         # Normalizar comuna
-        comuna_map = {
-            "nunoa": "Ñuñoa",
-            "nñuoa": "Ñuñoa",
-            "ñuñoa": "Ñuñoa",
-            "santiago": "Santiago",
-            "la_reina": "La Reina",
-            "la reina": "La Reina",
-            "estacion_central": "Estación Central",
-            "estacion central": "Estación Central"
-        }
-        comuna = request.comuna.value if hasattr(request.comuna, 'value') else str(request.comuna)
-        comuna_normalizada = comuna_map.get(comuna.lower(), comuna)
+        comuna_normalizada = _COMUNA_MAP.get(request.comuna.casefold(), request.comuna)
         
         # Preparar distancias si están disponibles
         distancias = {}
         if request.dist_transporte_min_m is not None:
             distancias['dist_transporte_min_m'] = request.dist_transporte_min_m
         
-        # Obtener tipo de propiedad
-        tipo = request.tipo_propiedad.value if hasattr(request.tipo_propiedad, 'value') else str(request.tipo_propiedad)
-        
         # Llamar al servicio
         resultado = satisfaccion_service.predecir_satisfaccion(
             superficie_util=request.superficie_util,
@@ -787,13 +1105,14 @@ def predecir_satisfaccion_endpoint(request: SatisfaccionRequest):
             banos=request.banos,
             precio_uf=request.precio_uf,
             comuna=comuna_normalizada,
-            tipo_propiedad=tipo,
+            tipo_propiedad=request.tipo_propiedad,
             latitud=request.latitud,
             longitud=request.longitud,
             distancias=distancias if distancias else None
         )
         
-        return SatisfaccionResponse(**resultado)
+        # Resultado interno del servicio con la forma de SatisfaccionResponse
+        return respuesta_json(orjson.dumps(resultado, option=orjson.OPT_SERIALIZE_NUMPY))
         
     except ValueError as e:
         raise HTTPException(
@@ -801,9 +1120,7 @@ def predecir_satisfaccion_endpoint(request: SatisfaccionRequest):
             detail=str(e)
         )
     except Exception as e:
-        logger.error(f"❌ Error prediciendo satisfacción: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
+        logger.exception("❌ Error prediciendo satisfacción: {}", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al predecir satisfacción: {str(e)}"
@@ -832,7 +1149,7 @@ def comparar_propiedades(request: ComparacionRequest):
         ComparacionResponse: Ranking ordenado + mejor opción + promedio
     """
     try:
-        logger.info(f"📊 Comparando {len(request.propiedades)} propiedades")
+        logger.debug("📊 Comparando {} propiedades", len(request.propiedades))
         
         if satisfaccion_service is None:
             raise HTTPException(
@@ -840,60 +1157,24 @@ def comparar_propiedades(request: ComparacionRequest):
                 detail="Servicio de satisfacción no disponible."
             )
         
-        # Convertir requests a dicts
-        propiedades_dict = []
-        for i, prop in enumerate(request.propiedades):
-            propiedades_dict.append({
-                'id': i + 1,
-                'direccion': f'Propiedad {i + 1}',
-                'superficie_util': prop.superficie_util,
-                'dormitorios': prop.dormitorios,
-                'banos': prop.banos,
-                'precio_uf': prop.precio_uf,
-                'comuna': prop.comuna.value,
-                'tipo_propiedad': prop.tipo_propiedad.value,
-            })
-        
-        # Comparar
-        df_ranking = satisfaccion_service.comparar_propiedades(propiedades_dict)
+        # Matriz de features armada una sola vez desde el request validado;
+        # el ranking (dicts con la forma de PropiedadRanking) se serializa
+        # directo (response_model queda solo para la documentación)
+        ranking = satisfaccion_service.comparar_propiedades(*request.como_arrays())
         
-        if df_ranking.empty:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Error al procesar las propiedades"
+        return respuesta_json(orjson.dumps({
+            'total_comparadas': len(ranking),
+            'ranking': ranking,
+            'mejor_opcion': ranking[0],
+            'promedio_satisfaccion': round(
+                math.fsum(r['satisfaccion'] for r in ranking) / len(ranking), 2
             )
-        
-        # Construir respuesta
-        ranking = []
-        for _, row in df_ranking.iterrows():
-            ranking.append(PropiedadRanking(
-                ranking=int(row['ranking']),
-                id=int(row['id']),
-                direccion=row['direccion'],
-                satisfaccion=round(row['satisfaccion'], 2),
-                nivel=row['nivel'],
-                emoji=row['emoji'],
-                precio_uf=float(row['precio_uf']),
-                superficie=float(row['superficie']),
-                dormitorios=int(row['dormitorios']),
-                banos=int(row['banos']),
-                comuna=row['comuna'],
-                tipo=row['tipo']
-            ))
-        
-        return ComparacionResponse(
-            total_comparadas=len(ranking),
-            ranking=ranking,
-            mejor_opcion=ranking[0],
-            promedio_satisfaccion=round(df_ranking['satisfaccion'].mean(), 2)
-        )
+        }))
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Error en comparación: {str(e)}")
-        import traceback
-        logger.error(traceback.format_exc())
+        logger.exception("❌ Error en comparación: {}", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al comparar propiedades: {str(e)}"
@@ -907,7 +1188,6 @@ def comparar_propiedades(request: ComparacionRequest):
 import json
 import os
 from pyproj import Transformer
-import math
 
 # Path a los datos originales
 DATOS_FILTRADOS_PATH = os.path.join(
@@ -957,7 +1237,7 @@ def cargar_geojson_filtrado(categoria: str, lat_centro: float, lon_centro: float
     archivo = os.path.join(DATOS_FILTRADOS_PATH, GEOJSON_MAPPING[categoria])
     
     if not os.path.exists(archivo):
-        logger.warning(f"Archivo no encontrado: {archivo}")
+        logger.warning("Archivo no encontrado: {}", archivo)
         return []
     
     try:
@@ -1033,7 +1313,7 @@ def cargar_geojson_filtrado(categoria: str, lat_centro: float, lon_centro: float
         return puntos_filtrados
         
     except Exception as e:
-        logger.error(f"Error cargando GeoJSON {categoria}: {e}")
+        logger.error("Error cargando GeoJSON {}: {}", categoria, e)
         return []
 
 
@@ -1065,7 +1345,7 @@ def obtener_servicios_geojson_cercanos(
     Retorna servicios organizados por categoría con indicador de distancia.
     """
     try:
-        logger.info(f"🗺️ Buscando servicios GeoJSON cerca de ({latitud}, {longitud}) - Radio: {radio}m")
+        logger.debug("🗺️ Buscando servicios GeoJSON cerca de ({}, {}) - Radio: {}m", latitud, longitud, radio)
         
         # Determinar qué categorías cargar
         if categorias:
@@ -1082,7 +1362,7 @@ def obtener_servicios_geojson_cercanos(
                 resultado[cat] = puntos
                 total += len(puntos)
         
-        logger.info(f"✅ Encontrados {total} servicios GeoJSON en {len(resultado)} categorías")
+        logger.debug("✅ Encontrados {} servicios GeoJSON en {} categorías", total, len(resultado))
         
         return {
             "categorias": resultado,
@@ -1092,9 +1372,7 @@ def obtener_servicios_geojson_cercanos(
         }
         
     except Exception as e:
-        logger.error(f"❌ Error obteniendo servicios GeoJSON: {str(e)}")
-        import traceback
-        logger.error(traceback.format_exc())
+        logger.exception("❌ Error obteniendo servicios GeoJSON: {}", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al obtener servicios GeoJSON: {str(e)}"
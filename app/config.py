@@ -4,7 +4,7 @@ Carga variables de entorno y configuraciones globales
 """
 from pydantic_settings import BaseSettings
 from functools import lru_cache
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -17,6 +17,7 @@ class Settings(BaseSettings):
     DB_NAME: str = "inmobiliario_db"
     DB_USER: str = "postgres"
     DB_PASSWORD: str
+    USE_PGBOUNCER: bool = False  # DATABASE_URL apunta a PgBouncer (pool_mode=transaction)
     
     # API
     API_TITLE: str = "API Inmobiliaria - Predicción de Precios"
@@ -26,6 +27,7 @@ class Settings(BaseSettings):
     API_PORT: int = 8000
     DEBUG: bool = True
     RELOAD: bool = True
+    SQL_ECHO: bool = False  # Loguea cada sentencia SQL (solo para depurar)
     
     # Seguridad
     SECRET_KEY: str
@@ -41,13 +43,34 @@ class Settings(BaseSettings):
         "http://127.0.0.1:3001"
     ]
     
+    # Caché Redis (opcional: sin REDIS_URL el caché queda desactivado)
+    REDIS_URL: Optional[str] = None
+    REDIS_TIMEOUT: float = 0.5
+    CACHE_TTL_COMUNAS: int = 3600
+    CACHE_TTL_STATS: int = 60
+    HTTP_CACHE_MAX_AGE: int = 300  # Cache-Control para datos casi estáticos
+    
+    # Caché en memoria de /puntos-interes/cercanos (por worker)
+    POI_CACHE_SIZE: int = 4096
+    POI_CACHE_TTL: int = 3600
+    
     # Modelo ML (opcional para desarrollo)
     MODEL_PATH: str = "/app/models/model.pkl"
+    ONNX_INTRA_OP_THREADS: int = 1  # Hilos por sesión ONNX Runtime (por worker)
     
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "logs/app.log"
     
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        """DATABASE_URL con el driver asyncpg (para AsyncSession)"""
+        url = self.DATABASE_URL
+        for prefijo in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+            if url.startswith(prefijo):
+                return "postgresql+asyncpg://" + url[len(prefijo):]
+        return url
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -2,26 +2,55 @@
 Configuración de la base de datos PostgreSQL/PostGIS
 Conexión, sesión y base declarativa
 """
+from uuid import uuid4
+
+import orjson
 from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from geoalchemy2 import Geometry
+from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import DeclarativeBase, sessionmaker
 from app.config import settings
 
-# Motor de base de datos
+# Pool de conexiones: local por proceso, o delegado a PgBouncer (modo transacción).
+# Con PgBouncer no se mantiene pool propio (NullPool) y asyncpg no puede reutilizar
+# sentencias preparadas entre transacciones (pueden caer en otra conexión del servidor)
+if settings.USE_PGBOUNCER:
+    _pool_kwargs = {"poolclass": NullPool}
+    _async_connect_args = {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__"
+    }
+else:
+    _pool_kwargs = {"pool_size": 10, "max_overflow": 20}
+    _async_connect_args = {}
+
+# Motor de base de datos (síncrono: servicios ML y scripts)
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
-    echo=settings.DEBUG
+    echo=settings.SQL_ECHO,
+    **_pool_kwargs
+)
+
+# Motor asíncrono (asyncpg) para los endpoints `async def`
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    echo=settings.SQL_ECHO,
+    json_deserializer=orjson.loads,  # json/jsonb (ej: json_agg) decodificado con orjson
+    connect_args=_async_connect_args,
+    **_pool_kwargs
 )
 
 # Sesión
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
-# Base declarativa
-Base = declarative_base()
+# Base declarativa (SQLAlchemy 2.x, modelos tipados con Mapped[...])
+class Base(DeclarativeBase):
+    pass
 
 
 def get_db():
@@ -36,6 +65,15 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    Dependency para obtener sesión asíncrona de base de datos
+    Uso: db: AsyncSession = Depends(get_async_db)
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
     """Inicializa la base de datos creando todas las tablas"""
     Base.metadata.create_all(bind=engine)
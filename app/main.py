@@ -72,7 +72,7 @@ async def startup_event():
         init_db()
         logger.info("✅ Base de datos inicializada")
     except Exception as e:
-        logger.error(f"❌ Error iniciando base de datos: {e}")
+        logger.error("❌ Error iniciando base de datos: {}", e)
     
     logger.info("=" * 70)
     logger.info(f"✅ Servidor listo en http://{settings.API_HOST}:{settings.API_PORT}")
@@ -110,7 +110,7 @@ def root():
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Manejador global de excepciones"""
-    logger.error(f"❌ Error no manejado: {exc}")
+    logger.error("❌ Error no manejado: {}", exc)
     return JSONResponse(
         status_code=500,
         content={
@@ -2,10 +2,14 @@
 Modelos de base de datos (ORM)
 Tablas: propiedades, comunas
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text, text
-from sqlalchemy.orm import relationship
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import Computed, Index, Integer, String, Float, DateTime, ForeignKey, Boolean, Text, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
-from geoalchemy2 import Geometry
+from geoalchemy2 import Geometry, Geography
+from geoalchemy2.elements import WKBElement
 from app.database import Base
 
 
@@ -13,132 +17,132 @@ class Comuna(Base):
     """Tabla de comunas de Santiago"""
     __tablename__ = "comunas"
     
-    id = Column(Integer, primary_key=True, index=True)
-    nombre = Column(String(100), unique=True, nullable=False, index=True)
-    codigo = Column(String(10), unique=True)
-    geometria = Column(Geometry('POLYGON', srid=4326))
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    nombre: Mapped[str] = mapped_column(String(100), unique=True, index=True)
+    codigo: Mapped[Optional[str]] = mapped_column(String(10), unique=True)
+    geometria: Mapped[Optional[WKBElement]] = mapped_column(Geometry('POLYGON', srid=4326))
     
     # Estadísticas
-    precio_promedio = Column(Float)
-    precio_m2_promedio = Column(Float)
-    total_propiedades = Column(Integer, default=0)
+    precio_promedio: Mapped[Optional[float]] = mapped_column(Float)
+    precio_m2_promedio: Mapped[Optional[float]] = mapped_column(Float)
+    total_propiedades: Mapped[Optional[int]] = mapped_column(Integer, default=0)
     
     # Metadata
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), onupdate=func.now())
     
     # Relaciones
-    propiedades = relationship("Propiedad", back_populates="comuna")
+    propiedades: Mapped[List["Propiedad"]] = relationship(back_populates="comuna")
 
 
 class Propiedad(Base):
     """Tabla de propiedades inmobiliarias"""
     __tablename__ = "propiedades"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     
     # Ubicación
-    comuna_id = Column(Integer, ForeignKey("comunas.id"), nullable=False)
-    direccion = Column(String(200))
-    latitud = Column(Float)
-    longitud = Column(Float)
-    geometria = Column(Geometry('POINT', srid=4326))
+    comuna_id: Mapped[int] = mapped_column(Integer, ForeignKey("comunas.id"))
+    direccion: Mapped[Optional[str]] = mapped_column(String(200))
+    latitud: Mapped[Optional[float]] = mapped_column(Float)
+    longitud: Mapped[Optional[float]] = mapped_column(Float)
+    geometria: Mapped[Optional[WKBElement]] = mapped_column(Geometry('POINT', srid=4326))
     
     # Características físicas
-    superficie_total = Column(Float, nullable=False)  # m²
-    superficie_construida = Column(Float)
-    superficie_util = Column(Float)  # Superficie útil real
-    superficie_terraza = Column(Float)
-    dormitorios = Column(Integer, nullable=False)
-    banos = Column(Integer, nullable=False)
-    estacionamientos = Column(Float)
-    ambientes = Column(Integer)
-    bodegas = Column(Float)
-    cant_max_habitantes = Column(Integer)
+    superficie_total: Mapped[float] = mapped_column(Float)  # m²
+    superficie_construida: Mapped[Optional[float]] = mapped_column(Float)
+    superficie_util: Mapped[Optional[float]] = mapped_column(Float)  # Superficie útil real
+    superficie_terraza: Mapped[Optional[float]] = mapped_column(Float)
+    dormitorios: Mapped[int] = mapped_column(Integer)
+    banos: Mapped[int] = mapped_column(Integer)
+    estacionamientos: Mapped[Optional[float]] = mapped_column(Float)
+    ambientes: Mapped[Optional[int]] = mapped_column(Integer)
+    bodegas: Mapped[Optional[float]] = mapped_column(Float)
+    cant_max_habitantes: Mapped[Optional[int]] = mapped_column(Integer)
     
     # Características del edificio/departamento
     # Por defecto, si no se entrega `tipo_departamento`, asumimos 'Casa'
     # - `default` aplica en el lado de SQLAlchemy al crear el objeto
     # - `server_default` aplica en el lado del servidor (Postgres) para inserts directos
-    tipo_departamento = Column(
+    tipo_departamento: Mapped[Optional[str]] = mapped_column(
         String(100),
         nullable=True,
         default='Casa',
         server_default=text("'Casa'")
     )  # 'interior', 'exterior', etc.
-    numero_piso_unidad = Column(Integer)
-    cantidad_pisos = Column(Integer)  # Pisos del edificio
-    departamentos_piso = Column(Integer)
-    gastos_comunes = Column(Float)
-    orientacion = Column(String(50))
+    numero_piso_unidad: Mapped[Optional[int]] = mapped_column(Integer)
+    cantidad_pisos: Mapped[Optional[int]] = mapped_column(Integer)  # Pisos del edificio
+    departamentos_piso: Mapped[Optional[int]] = mapped_column(Integer)
+    gastos_comunes: Mapped[Optional[float]] = mapped_column(Float)
+    orientacion: Mapped[Optional[str]] = mapped_column(String(50))
     
     # Características espaciales - Educación (distancias en metros)
-    dist_educacion_basica_m = Column(Float)
-    dist_educacion_superior_m = Column(Float)
-    dist_educacion_parvularia_m = Column(Float)
-    dist_educacion_min_m = Column(Float)  # Distancia mínima a cualquier educación
+    dist_educacion_basica_m: Mapped[Optional[float]] = mapped_column(Float)
+    dist_educacion_superior_m: Mapped[Optional[float]] = mapped_column(Float)
+    dist_educacion_parvularia_m: Mapped[Optional[float]] = mapped_column(Float)
+    dist_educacion_min_m: Mapped[Optional[float]] = mapped_column(Float)  # Distancia mínima a cualquier educación
     
     # Características espaciales - Salud (metros)
-    dist_salud_m = Column(Float)
-    dist_salud_clinicas_m = Column(Float)
-    dist_salud_min_m = Column(Float)
+    dist_salud_m: Mapped[Optional[float]] = mapped_column(Float)
+    dist_salud_clinicas_m: Mapped[Optional[float]] = mapped_column(Float)
+    dist_salud_min_m: Mapped[Optional[float]] = mapped_column(Float)
     
     # Características espaciales - Transporte (metros)
-    dist_transporte_metro_m = Column(Float)
-    dist_transporte_carga_m = Column(Float)
-    dist_transporte_min_m = Column(Float)
+    dist_transporte_metro_m: Mapped[Optional[float]] = mapped_column(Float)
+    dist_transporte_carga_m: Mapped[Optional[float]] = mapped_column(Float)
+    dist_transporte_min_m: Mapped[Optional[float]] = mapped_column(Float)
     
     # Características espaciales - Seguridad (metros)
-    dist_seguridad_pdi_m = Column(Float)
-    dist_seguridad_cuarteles_m = Column(Float)
-    dist_seguridad_bomberos_m = Column(Float)
-    dist_seguridad_min_m = Column(Float)
+    dist_seguridad_pdi_m: Mapped[Optional[float]] = mapped_column(Float)
+    dist_seguridad_cuarteles_m: Mapped[Optional[float]] = mapped_column(Float)
+    dist_seguridad_bomberos_m: Mapped[Optional[float]] = mapped_column(Float)
+    dist_seguridad_min_m: Mapped[Optional[float]] = mapped_column(Float)
     
     # Características espaciales - Amenidades (metros)
-    dist_areas_verdes_m = Column(Float)
-    dist_ocio_m = Column(Float)
-    dist_turismo_m = Column(Float)
-    dist_comercio_m = Column(Float)
-    dist_servicios_publicos_m = Column(Float)
-    dist_servicios_sernam_m = Column(Float)
-    dist_puntos_interes_m = Column(Float)
+    dist_areas_verdes_m: Mapped[Optional[float]] = mapped_column(Float)
+    dist_ocio_m: Mapped[Optional[float]] = mapped_column(Float)
+    dist_turismo_m: Mapped[Optional[float]] = mapped_column(Float)
+    dist_comercio_m: Mapped[Optional[float]] = mapped_column(Float)
+    dist_servicios_publicos_m: Mapped[Optional[float]] = mapped_column(Float)
+    dist_servicios_sernam_m: Mapped[Optional[float]] = mapped_column(Float)
+    dist_puntos_interes_m: Mapped[Optional[float]] = mapped_column(Float)
     
     # Columnas legacy (para compatibilidad con modelo ML actual)
-    dist_metro = Column(Float)  # dist_transporte_metro_m / 1000
-    dist_supermercado = Column(Float)  # dist_comercio_m / 1000
-    dist_area_verde = Column(Float)  # dist_areas_verdes_m / 1000
-    dist_colegio = Column(Float)  # dist_educacion_min_m / 1000
-    dist_hospital = Column(Float)  # dist_salud_min_m / 1000
-    dist_mall = Column(Float)  # dist_turismo_m / 1000
+    dist_metro: Mapped[Optional[float]] = mapped_column(Float)  # dist_transporte_metro_m / 1000
+    dist_supermercado: Mapped[Optional[float]] = mapped_column(Float)  # dist_comercio_m / 1000
+    dist_area_verde: Mapped[Optional[float]] = mapped_column(Float)  # dist_areas_verdes_m / 1000
+    dist_colegio: Mapped[Optional[float]] = mapped_column(Float)  # dist_educacion_min_m / 1000
+    dist_hospital: Mapped[Optional[float]] = mapped_column(Float)  # dist_salud_min_m / 1000
+    dist_mall: Mapped[Optional[float]] = mapped_column(Float)  # dist_turismo_m / 1000
     
     # Precio
-    precio = Column(Float)  # Precio real (si existe)
-    precio_log = Column(Float)  # log(precio) real
-    precio_predicho = Column(Float)  # Predicción
-    precio_predicho_log = Column(Float)  # log(predicción)
-    divisa = Column(String(10), default='CLP')
+    precio: Mapped[Optional[float]] = mapped_column(Float)  # Precio real (si existe)
+    precio_log: Mapped[Optional[float]] = mapped_column(Float)  # log(precio) real
+    precio_predicho: Mapped[Optional[float]] = mapped_column(Float)  # Predicción
+    precio_predicho_log: Mapped[Optional[float]] = mapped_column(Float)  # log(predicción)
+    divisa: Mapped[Optional[str]] = mapped_column(String(10), default='CLP')
     
     # Metadata
-    fuente = Column(String(50))  # 'portalinmobiliario', 'yapo', 'manual', etc.
-    url_original = Column(String(500))
-    titulo = Column(String(500))
-    descripcion = Column(Text)
-    codigo = Column(String(100))  # Código del anuncio
-    fecha_publicacion = Column(DateTime(timezone=True))
+    fuente: Mapped[Optional[str]] = mapped_column(String(50))  # 'portalinmobiliario', 'yapo', 'manual', etc.
+    url_original: Mapped[Optional[str]] = mapped_column(String(500))
+    titulo: Mapped[Optional[str]] = mapped_column(String(500))
+    descripcion: Mapped[Optional[str]] = mapped_column(Text)
+    codigo: Mapped[Optional[str]] = mapped_column(String(100))  # Código del anuncio
+    fecha_publicacion: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
     
     # UTM coordinates
-    x_utm = Column(Float)
-    y_utm = Column(Float)
-    zona_utm = Column(String(10))
+    x_utm: Mapped[Optional[float]] = mapped_column(Float)
+    y_utm: Mapped[Optional[float]] = mapped_column(Float)
+    zona_utm: Mapped[Optional[str]] = mapped_column(String(10))
     
-    is_outlier = Column(Boolean, default=False)
-    is_validated = Column(Boolean, default=False)
+    is_outlier: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
+    is_validated: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), onupdate=func.now())
     
     # Relaciones
-    comuna = relationship("Comuna", back_populates="propiedades")
+    comuna: Mapped["Comuna"] = relationship(back_populates="propiedades")
 
 
 # ============================================================================
@@ -148,25 +152,38 @@ class Propiedad(Base):
 class PuntoInteres(Base):
     """Tabla base para puntos de interés / servicios"""
     __tablename__ = "puntos_interes"
-    
-    id = Column(Integer, primary_key=True, index=True)
-    tipo = Column(String(50), nullable=False, index=True)  # 'metro', 'colegio', etc.
-    nombre = Column(String(200), nullable=False)
-    direccion = Column(String(300))
+    __table_args__ = (
+        # Índice cubriente para /puntos-interes/tipo/{tipo} (index-only scan)
+        Index(
+            "idx_puntos_interes_tipo_cover",
+            "tipo",
+            postgresql_include=["id", "nombre", "latitud", "longitud", "direccion"]
+        ),
+    )
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    tipo: Mapped[str] = mapped_column(String(50))  # 'metro', 'colegio', etc.
+    nombre: Mapped[str] = mapped_column(String(200))
+    direccion: Mapped[Optional[str]] = mapped_column(String(300))
     
     # Ubicación
-    latitud = Column(Float, nullable=False)
-    longitud = Column(Float, nullable=False)
-    geometria = Column(Geometry('POINT', srid=4326))
+    latitud: Mapped[float] = mapped_column(Float)
+    longitud: Mapped[float] = mapped_column(Float)
+    geometria: Mapped[Optional[WKBElement]] = mapped_column(Geometry('POINT', srid=4326))
+    # Copia geography precalculada (índice GiST) para ST_DWithin/ST_Distance en metros
+    geog: Mapped[Optional[WKBElement]] = mapped_column(
+        Geography('POINT', srid=4326),
+        Computed("geometria::geography", persisted=True)
+    )
     
     # Información adicional
-    descripcion = Column(Text)
-    telefono = Column(String(50))
-    horario = Column(String(200))
+    descripcion: Mapped[Optional[str]] = mapped_column(Text)
+    telefono: Mapped[Optional[str]] = mapped_column(String(50))
+    horario: Mapped[Optional[str]] = mapped_column(String(200))
     
     # Metadata
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), onupdate=func.now())
     
     def __repr__(self):
         return f"<PuntoInteres {self.tipo}: {self.nombre}>"
@@ -0,0 +1,34 @@
+"""
+Ejemplos de OpenAPI cargados desde archivos JSON
+
+Los ejemplos de request/response se guardan junto a cada módulo de schemas
+(`<modulo>.examples.json`) y solo se leen al generar el esquema OpenAPI,
+en vez de quedar como dicts en memoria en cada worker.
+"""
+import functools
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+
+@functools.lru_cache(maxsize=None)
+def _cargar_ejemplos(ruta: Path) -> Dict[str, Any]:
+    """Lee (una sola vez) el archivo de ejemplos de un módulo"""
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def ejemplo_json(modulo: str, nombre: str) -> Callable[[Dict[str, Any]], None]:
+    """
+    Crea un `json_schema_extra` que agrega el ejemplo `nombre` al esquema
+    
+    Args:
+        modulo: Ruta del módulo de schemas (`__file__`)
+        nombre: Clave del ejemplo en el archivo (nombre del schema)
+    """
+    ruta = Path(modulo).with_suffix(".examples.json")
+    
+    def agregar_ejemplo(schema: Dict[str, Any]) -> None:
+        schema["example"] = _cargar_ejemplos(ruta)[nombre]
+    
+    return agregar_ejemplo
@@ -2,7 +2,7 @@
 Schemas Pydantic para validación y serialización
 Request/Response models
 """
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 from typing import Optional, List, Dict, Any
 from enum import Enum
 from datetime import datetime
@@ -48,9 +48,6 @@ class PropiedadResponse(BaseModel):
     precio: Optional[float]
     precio_predicho: Optional[float]
     created_at: datetime
-    
-    class Config:
-        from_attributes = True
 
 
 # ============================================================================
@@ -63,9 +60,6 @@ class ComunaStats(BaseModel):
     total_propiedades: int
     precio_promedio: Optional[float]
     precio_m2_promedio: Optional[float]
-    
-    class Config:
-        from_attributes = True
 
 
 # ============================================================================
@@ -151,12 +145,13 @@ class PreferenciasUsuario(BaseModel):
     requiere_estacionamiento: bool = False
     piso_maximo: Optional[int] = None
 
-    @validator('comunas_preferidas', pre=True, always=False)
-    def _copy_legacy_comunas(cls, v, values):
+    @model_validator(mode='before')
+    @classmethod
+    def _copy_legacy_comunas(cls, data: Any) -> Any:
         """Compatibilidad: si el cliente envía `comunas` antiguo, copiarlo a `comunas_preferidas`."""
-        if v is None and values.get('comunas'):
-            return values.get('comunas')
-        return v
+        if isinstance(data, dict) and data.get('comunas') and data.get('comunas_preferidas') is None:
+            return {**data, 'comunas_preferidas': data['comunas']}
+        return data
 
 
 class ScoreDetallado(BaseModel):
@@ -165,6 +160,9 @@ class ScoreDetallado(BaseModel):
     score_precio: float
     score_ubicacion: float
     score_caracteristicas: float
+    
+    # Inmutable (y hashable): se crea uno por propiedad candidata
+    model_config = ConfigDict(frozen=True, extra='forbid')
 
 
 class PropiedadRecomendada(BaseModel):
@@ -177,8 +175,7 @@ class PropiedadRecomendada(BaseModel):
     precio: Optional[float]
     score: ScoreDetallado
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(frozen=True, extra='forbid')
 
 
 class RuidoAmbiente(str, Enum):
@@ -199,7 +196,7 @@ class PreferenciasUrbanas(BaseModel):
 
 
 # Resolver forward refs (ruido y urbanas se referenciaban antes de ser declaradas)
-PreferenciasUsuario.update_forward_refs()
+PreferenciasUsuario.model_rebuild()
 
 
 # ============================================================================
@@ -214,14 +211,14 @@ class PuntoInteresBase(BaseModel):
     longitud: float
     direccion: Optional[str] = None
     distancia: Optional[float] = None  # Distancia en metros desde punto de consulta
+    
+    # Inmutable (y hashable); las subclases heredan esta configuración
+    model_config = ConfigDict(frozen=True, extra='forbid')
 
 
 class PuntoInteresResponse(PuntoInteresBase):
     """Schema de respuesta para punto de interés"""
     id: int
-    
-    class Config:
-        from_attributes = True
 
 
 class PuntosInteresCercanosResponse(BaseModel):
@@ -2,11 +2,27 @@
 Schemas para sistema de recomendaciones con Machine Learning
 Sistema avanzado de preferencias y feedback del usuario
 """
-from pydantic import BaseModel, Field, validator
-from typing import Optional, List, Dict, Any
+import math
+
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator, model_validator
+from typing import Annotated, Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
 
+from typing_extensions import TypedDict
+
+
+# ============================================================================
+# TIPOS REUTILIZABLES
+# ============================================================================
+
+# Un único tipo acotado compartido por todos los campos `importancia_*`
+# (pydantic-core construye un solo validador en vez de uno por campo)
+Importancia = Annotated[int, Field(ge=-10, le=10)]
+
+# Distancias máximas aceptables en metros (hasta 20 km)
+DistanciaMetros = Annotated[Optional[int], Field(ge=0, le=20000)]
+
 
 # ============================================================================
 # ENUMS
@@ -37,14 +53,14 @@ class NivelImportancia(int, Enum):
 
 class PreferenciasTransporte(BaseModel):
     """Preferencias específicas de transporte"""
-    importancia_metro: int = Field(0, ge=-10, le=10, description="Importancia del metro (-10: evitar, 0: neutro, 10: muy importante)")
-    distancia_maxima_metro_m: Optional[int] = Field(1000, description="Distancia máxima aceptable al metro en metros")
+    importancia_metro: Importancia = Field(0, description="Importancia del metro (-10: evitar, 0: neutro, 10: muy importante)")
+    distancia_maxima_metro_m: DistanciaMetros = Field(1000, description="Distancia máxima aceptable al metro en metros")
     
-    importancia_buses: int = Field(0, ge=-10, le=10, description="Importancia de paraderos de buses")
-    distancia_maxima_buses_m: Optional[int] = Field(500, description="Distancia máxima a paraderos")
+    importancia_buses: Importancia = Field(0, description="Importancia de paraderos de buses")
+    distancia_maxima_buses_m: DistanciaMetros = Field(500, description="Distancia máxima a paraderos")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "importancia_metro": 9,
                 "distancia_maxima_metro_m": 500,
@@ -52,18 +68,19 @@ class PreferenciasTransporte(BaseModel):
                 "distancia_maxima_buses_m": 300
             }
         }
+    )
 
 
 class PreferenciasEducacion(BaseModel):
     """Preferencias específicas de educación"""
-    importancia_colegios: int = Field(0, ge=-10, le=10, description="Importancia de cercanía a colegios")
-    distancia_maxima_colegios_m: Optional[int] = Field(1000, description="Distancia máxima a colegios")
+    importancia_colegios: Importancia = Field(0, description="Importancia de cercanía a colegios")
+    distancia_maxima_colegios_m: DistanciaMetros = Field(1000, description="Distancia máxima a colegios")
     
-    importancia_universidades: int = Field(0, ge=-10, le=10, description="Importancia de universidades")
-    distancia_maxima_universidades_m: Optional[int] = Field(3000, description="Distancia máxima a universidades")
+    importancia_universidades: Importancia = Field(0, description="Importancia de universidades")
+    distancia_maxima_universidades_m: DistanciaMetros = Field(3000, description="Distancia máxima a universidades")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "importancia_colegios": -8,  # Usuario NO quiere colegios cerca (ruido)
                 "distancia_maxima_colegios_m": 500,
@@ -71,21 +88,22 @@ class PreferenciasEducacion(BaseModel):
                 "distancia_maxima_universidades_m": 3000
             }
         }
+    )
 
 
 class PreferenciasSalud(BaseModel):
     """Preferencias específicas de salud"""
-    importancia_hospitales: int = Field(0, ge=-10, le=10, description="Importancia de hospitales")
-    distancia_maxima_hospitales_m: Optional[int] = Field(2000, description="Distancia máxima a hospitales")
+    importancia_hospitales: Importancia = Field(0, description="Importancia de hospitales")
+    distancia_maxima_hospitales_m: DistanciaMetros = Field(2000, description="Distancia máxima a hospitales")
     
-    importancia_consultorios: int = Field(0, ge=-10, le=10, description="Importancia de consultorios")
-    distancia_maxima_consultorios_m: Optional[int] = Field(1000, description="Distancia máxima a consultorios")
+    importancia_consultorios: Importancia = Field(0, description="Importancia de consultorios")
+    distancia_maxima_consultorios_m: DistanciaMetros = Field(1000, description="Distancia máxima a consultorios")
     
-    importancia_farmacias: int = Field(0, ge=-10, le=10, description="Importancia de farmacias")
-    distancia_maxima_farmacias_m: Optional[int] = Field(500, description="Distancia máxima a farmacias")
+    importancia_farmacias: Importancia = Field(0, description="Importancia de farmacias")
+    distancia_maxima_farmacias_m: DistanciaMetros = Field(500, description="Distancia máxima a farmacias")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "importancia_hospitales": 8,
                 "distancia_maxima_hospitales_m": 1500,
@@ -95,44 +113,45 @@ class PreferenciasSalud(BaseModel):
                 "distancia_maxima_farmacias_m": 400
             }
         }
+    )
 
 
 class PreferenciasServicios(BaseModel):
     """Preferencias de servicios y comercio"""
-    importancia_supermercados: int = Field(0, ge=-10, le=10, description="Importancia de supermercados")
-    distancia_maxima_supermercados_m: Optional[int] = Field(1000, description="Distancia máxima a supermercados")
+    importancia_supermercados: Importancia = Field(0, description="Importancia de supermercados")
+    distancia_maxima_supermercados_m: DistanciaMetros = Field(1000, description="Distancia máxima a supermercados")
     
-    importancia_malls: int = Field(0, ge=-10, le=10, description="Importancia de malls")
-    distancia_maxima_malls_m: Optional[int] = Field(3000, description="Distancia máxima a malls")
+    importancia_malls: Importancia = Field(0, description="Importancia de malls")
+    distancia_maxima_malls_m: DistanciaMetros = Field(3000, description="Distancia máxima a malls")
     
-    importancia_restaurantes: int = Field(0, ge=-10, le=10, description="Importancia de restaurantes")
-    distancia_maxima_restaurantes_m: Optional[int] = Field(500, description="Distancia máxima a restaurantes")
+    importancia_restaurantes: Importancia = Field(0, description="Importancia de restaurantes")
+    distancia_maxima_restaurantes_m: DistanciaMetros = Field(500, description="Distancia máxima a restaurantes")
     
-    importancia_gimnasios: int = Field(0, ge=-10, le=10, description="Importancia de gimnasios")
-    distancia_maxima_gimnasios_m: Optional[int] = Field(1000, description="Distancia máxima a gimnasios")
+    importancia_gimnasios: Importancia = Field(0, description="Importancia de gimnasios")
+    distancia_maxima_gimnasios_m: DistanciaMetros = Field(1000, description="Distancia máxima a gimnasios")
 
 
 class PreferenciasAreasVerdes(BaseModel):
     """Preferencias de áreas verdes y recreación"""
-    importancia_parques: int = Field(0, ge=-10, le=10, description="Importancia de parques")
-    distancia_maxima_parques_m: Optional[int] = Field(800, description="Distancia máxima a parques")
+    importancia_parques: Importancia = Field(0, description="Importancia de parques")
+    distancia_maxima_parques_m: DistanciaMetros = Field(800, description="Distancia máxima a parques")
     
-    importancia_plazas: int = Field(0, ge=-10, le=10, description="Importancia de plazas")
-    distancia_maxima_plazas_m: Optional[int] = Field(500, description="Distancia máxima a plazas")
+    importancia_plazas: Importancia = Field(0, description="Importancia de plazas")
+    distancia_maxima_plazas_m: DistanciaMetros = Field(500, description="Distancia máxima a plazas")
     
-    importancia_ciclovias: int = Field(0, ge=-10, le=10, description="Importancia de ciclovías")
+    importancia_ciclovias: Importancia = Field(0, description="Importancia de ciclovías")
 
 
 class PreferenciasSeguridad(BaseModel):
     """Preferencias relacionadas con seguridad"""
-    importancia_comisarias: int = Field(0, ge=-10, le=10, description="Importancia de comisarías")
-    distancia_maxima_comisarias_m: Optional[int] = Field(2000, description="Distancia máxima a comisarías")
+    importancia_comisarias: Importancia = Field(0, description="Importancia de comisarías")
+    distancia_maxima_comisarias_m: DistanciaMetros = Field(2000, description="Distancia máxima a comisarías")
     
-    importancia_bomberos: int = Field(0, ge=-10, le=10, description="Importancia de bomberos")
-    distancia_maxima_bomberos_m: Optional[int] = Field(3000, description="Distancia máxima a bomberos")
+    importancia_bomberos: Importancia = Field(0, description="Importancia de bomberos")
+    distancia_maxima_bomberos_m: DistanciaMetros = Field(3000, description="Distancia máxima a bomberos")
     
-    importancia_iluminacion: int = Field(0, ge=-10, le=10, description="Importancia de buena iluminación")
-    importancia_vigilancia: int = Field(0, ge=-10, le=10, description="Importancia de vigilancia/conserje")
+    importancia_iluminacion: Importancia = Field(0, description="Importancia de buena iluminación")
+    importancia_vigilancia: Importancia = Field(0, description="Importancia de vigilancia/conserje")
 
 
 class PreferenciasEdificio(BaseModel):
@@ -140,15 +159,15 @@ class PreferenciasEdificio(BaseModel):
     
     # Gastos comunes
     gastos_comunes_max: Optional[float] = Field(None, description="Presupuesto máximo de gastos comunes en CLP")
-    importancia_gastos_bajos: int = Field(0, ge=-10, le=10, description="Importancia de gastos comunes bajos (10 = muy importante)")
+    importancia_gastos_bajos: Importancia = Field(0, description="Importancia de gastos comunes bajos (10 = muy importante)")
     
     # Piso y altura
-    importancia_piso_alto: int = Field(0, ge=-10, le=10, description="Preferencia por pisos altos (+10) o bajos (-10)")
+    importancia_piso_alto: Importancia = Field(0, description="Preferencia por pisos altos (+10) o bajos (-10)")
     piso_minimo: Optional[int] = Field(None, ge=1, le=30, description="Piso mínimo aceptable")
     piso_maximo: Optional[int] = Field(None, ge=1, le=30, description="Piso máximo aceptable")
     
     # Orientación
-    importancia_orientacion: int = Field(0, ge=-10, le=10, description="Importancia de la orientación")
+    importancia_orientacion: Importancia = Field(0, description="Importancia de la orientación")
     orientaciones_preferidas: Optional[List[str]] = Field(
         None, 
         description="Orientaciones preferidas: ['norte', 'sur', 'este', 'oeste']"
@@ -157,18 +176,18 @@ class PreferenciasEdificio(BaseModel):
     # Terraza
     necesita_terraza: bool = Field(False, description="Si requiere terraza obligatoriamente")
     terraza_minima_m2: Optional[float] = Field(None, ge=0, description="Superficie mínima de terraza en m²")
-    importancia_terraza: int = Field(0, ge=-10, le=10, description="Importancia de tener terraza")
+    importancia_terraza: Importancia = Field(0, description="Importancia de tener terraza")
     
     # Tipo de departamento
     tipo_preferido: Optional[str] = Field(None, description="'interior' o 'exterior'")
-    importancia_tipo: int = Field(0, ge=-10, le=10, description="Importancia del tipo de departamento")
+    importancia_tipo: Importancia = Field(0, description="Importancia del tipo de departamento")
     
     # Privacidad/Densidad
     departamentos_por_piso_max: Optional[int] = Field(None, ge=1, description="Máximo número de deptos por piso")
-    importancia_privacidad: int = Field(0, ge=-10, le=10, description="Importancia de privacidad (menos deptos/piso)")
+    importancia_privacidad: Importancia = Field(0, description="Importancia de privacidad (menos deptos/piso)")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "gastos_comunes_max": 100000,
                 "importancia_gastos_bajos": 8,
@@ -182,6 +201,7 @@ class PreferenciasEdificio(BaseModel):
                 "importancia_terraza": 10
             }
         }
+    )
 
 
 class PreferenciasDetalladas(BaseModel):
@@ -227,41 +247,42 @@ class PreferenciasDetalladas(BaseModel):
     peso_areas_verdes: float = Field(0.05, ge=0, le=1, description="Peso global de áreas verdes")
     peso_edificio: float = Field(0.12, ge=0, le=1, description="Peso global de características del edificio")
     
-    @validator('precio_min', 'precio_max', 'superficie_min', 'superficie_max')
+    @field_validator('precio_min', 'precio_max', 'superficie_min', 'superficie_max')
+    @classmethod
     def validar_valores_positivos(cls, v):
         """Valida que los valores numéricos sean positivos si están presentes"""
         if v is not None and v <= 0:
             raise ValueError(f'El valor debe ser mayor que 0 si se proporciona')
         return v
     
-    @validator('precio_max')
-    def validar_rango_precio(cls, v, values):
+    @model_validator(mode='after')
+    def validar_rango_precio(self) -> 'PreferenciasDetalladas':
         """Valida que precio_max sea mayor que precio_min"""
-        if v is not None and values.get('precio_min') is not None:
-            if v <= values.get('precio_min'):
+        if self.precio_max is not None and self.precio_min is not None:
+            if self.precio_max <= self.precio_min:
                 raise ValueError('precio_max debe ser mayor que precio_min')
-        return v
+        return self
     
-    @validator('peso_edificio')
-    def validar_suma_pesos(cls, v, values):
+    @model_validator(mode='after')
+    def validar_suma_pesos(self) -> 'PreferenciasDetalladas':
         """Valida que la suma de pesos sea aproximadamente 1.0"""
-        suma = (
-            values.get('peso_precio', 0) +
-            values.get('peso_ubicacion', 0) +
-            values.get('peso_tamano', 0) +
-            values.get('peso_transporte', 0) +
-            values.get('peso_educacion', 0) +
-            values.get('peso_salud', 0) +
-            values.get('peso_servicios', 0) +
-            values.get('peso_areas_verdes', 0) +
-            v  # peso_edificio
-        )
+        suma = math.fsum((
+            self.peso_precio,
+            self.peso_ubicacion,
+            self.peso_tamano,
+            self.peso_transporte,
+            self.peso_educacion,
+            self.peso_salud,
+            self.peso_servicios,
+            self.peso_areas_verdes,
+            self.peso_edificio
+        ))
         if abs(suma - 1.0) > 0.05:  # Tolerancia de 5%
             raise ValueError(f'La suma de pesos debe ser cercana a 1.0 (actual: {suma:.2f})')
-        return v
+        return self
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "precio_min": 250000,
                 "precio_max": 350000,
@@ -287,6 +308,7 @@ class PreferenciasDetalladas(BaseModel):
                 }
             }
         }
+    )
 
 
 # ============================================================================
@@ -304,8 +326,8 @@ class FeedbackPropiedad(BaseModel):
     # Context de la búsqueda
     preferencias_usadas: Optional[Dict[str, Any]] = Field(None, description="Preferencias que se usaron")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "propiedad_id": 123,
                 "tipo_feedback": "me_gusta",
@@ -314,6 +336,7 @@ class FeedbackPropiedad(BaseModel):
                 "preferencias_usadas": {}
             }
         }
+    )
 
 
 class HistorialBusqueda(BaseModel):
@@ -331,15 +354,21 @@ class HistorialBusqueda(BaseModel):
 # RESPUESTAS CON ML
 # ============================================================================
 
-class ScoreML(BaseModel):
-    """Score detallado con explicación del modelo ML"""
-    categoria: str = Field(..., description="Categoría del score")
-    score: float = Field(..., ge=0, le=100, description="Score de 0-100")
-    peso: float = Field(..., description="Peso de esta categoría")
-    contribucion: float = Field(..., description="Contribución al score total")
-    explicacion: str = Field(..., description="Explicación de por qué ese score")
-    factores_positivos: List[str] = Field(default_factory=list, description="Factores que sumaron")
-    factores_negativos: List[str] = Field(default_factory=list, description="Factores que restaron")
+class ScoreML(TypedDict):
+    """
+    Score detallado con explicación del modelo ML
+    
+    Es un dict tipado (no un BaseModel): se arma uno por categoría para cada
+    propiedad candidata, así que crearlo no pasa por `BaseModel.__init__`;
+    se valida igual como parte de `PropiedadRecomendadaML`.
+    """
+    categoria: Annotated[str, Field(description="Categoría del score")]
+    score: Annotated[float, Field(ge=0, le=100, description="Score de 0-100")]
+    peso: Annotated[float, Field(description="Peso de esta categoría")]
+    contribucion: Annotated[float, Field(description="Contribución al score total")]
+    explicacion: Annotated[str, Field(description="Explicación de por qué ese score")]
+    factores_positivos: Annotated[List[str], Field(description="Factores que sumaron")]
+    factores_negativos: Annotated[List[str], Field(description="Factores que restaron")]
 
 
 class PropiedadRecomendadaML(BaseModel):
@@ -382,8 +411,8 @@ class PropiedadRecomendadaML(BaseModel):
     # Distancias relevantes
     distancias: Dict[str, float] = Field(default_factory=dict, description="Distancias a servicios clave")
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "id": 123,
                 "direccion": "Av. Grecia 5678, Ñuñoa",
@@ -418,6 +447,7 @@ class PropiedadRecomendadaML(BaseModel):
                 }
             }
         }
+    )
 
 
 class RecomendacionesResponseML(BaseModel):
@@ -433,3 +463,7 @@ class RecomendacionesResponseML(BaseModel):
     
     # Sugerencias para mejorar búsqueda
     sugerencias: Optional[List[str]] = Field(None, description="Sugerencias para obtener mejores resultados")
+
+
+# Serializador precompilado de la respuesta (bytes JSON directo desde pydantic-core)
+RECOMENDACIONES_ADAPTER = TypeAdapter(RecomendacionesResponseML)
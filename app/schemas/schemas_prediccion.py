@@ -1,9 +1,13 @@
 """
 Schemas para predicción de precios usando modelos ML de Semana 3
 """
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field
 from typing import Optional, Dict
 
+from typing_extensions import TypedDict
+
+from app.schemas.ejemplos import ejemplo_json
+
 
 class PrediccionRequest(BaseModel):
     """
@@ -57,17 +61,17 @@ class PrediccionRequest(BaseModel):
     # Ubicación (para calcular densidades espaciales)
     latitud: float = Field(
         ..., 
-        ge=-90, 
-        le=90,
-        description="Latitud de la propiedad (WGS84)",
+        ge=-33.7,
+        le=-33.2,
+        description="Latitud de la propiedad (WGS84, rango de Santiago: -33.7 a -33.2)",
         examples=[-33.4489]
     )
     
     longitud: float = Field(
         ..., 
-        ge=-180, 
-        le=180,
-        description="Longitud de la propiedad (WGS84)",
+        ge=-71.0,
+        le=-70.4,
+        description="Longitud de la propiedad (WGS84, rango de Santiago: -71.0 a -70.4)",
         examples=[-70.6693]
     )
     
@@ -84,36 +88,23 @@ class PrediccionRequest(BaseModel):
         description="Si True, usa meta-modelo stacking (mejor R²=0.489). Si False, usa GWRF por cluster."
     )
     
-    @field_validator('latitud')
-    @classmethod
-    def validar_latitud_santiago(cls, v):
-        """Validar que la latitud está en rango razonable para Santiago"""
-        if not (-33.7 <= v <= -33.2):
-            raise ValueError('Latitud fuera del rango de Santiago (-33.7 a -33.2)')
-        return v
-    
-    @field_validator('longitud')
-    @classmethod
-    def validar_longitud_santiago(cls, v):
-        """Validar que la longitud está en rango razonable para Santiago"""
-        if not (-71.0 <= v <= -70.4):
-            raise ValueError('Longitud fuera del rango de Santiago (-71.0 a -70.4)')
-        return v
-    
     class Config:
-        json_schema_extra = {
-            "example": {
-                "superficie_util": 85.0,
-                "dormitorios": 3,
-                "banos": 2,
-                "estacionamientos": 1,
-                "bodegas": 1,
-                "latitud": -33.4489,
-                "longitud": -70.6693,
-                "cant_max_habitantes": 6,
-                "usar_stacking": True
-            }
-        }
+        json_schema_extra = ejemplo_json(__file__, "PrediccionRequest")
+
+
+class PrediccionesBase(TypedDict, total=False):
+    """Predicción (UF/m²) de cada modelo base; solo vienen los modelos usados"""
+    rf_global: float
+    gwrf_cluster: float
+    gwrf_densidad: float
+    fallback: float
+
+
+class FeaturesCalculadas(TypedDict, total=False):
+    """Features derivadas calculadas automáticamente (vacío en predicción de emergencia)"""
+    m2_por_habitante: float
+    total_habitaciones: int
+    ratio_bano_dorm: float
 
 
 class PrediccionResponse(BaseModel):
@@ -158,36 +149,18 @@ class PrediccionResponse(BaseModel):
         description="ID del cluster espacial asignado (0-4)"
     )
     
-    predicciones_base: Dict[str, float] = Field(
+    predicciones_base: PrediccionesBase = Field(
         ...,
         description="Predicciones de cada modelo base (rf_global, gwrf_cluster, gwrf_densidad)"
     )
     
-    features_calculadas: Dict[str, float] = Field(
+    features_calculadas: FeaturesCalculadas = Field(
         ...,
         description="Features derivadas calculadas automáticamente"
     )
     
     class Config:
-        json_schema_extra = {
-            "example": {
-                "precio_m2_predicho": 45.5,
-                "precio_total_estimado": 3867.5,
-                "confianza": 0.75,
-                "metodo": "stacking",
-                "cluster_asignado": 2,
-                "predicciones_base": {
-                    "rf_global": 44.2,
-                    "gwrf_cluster": 46.8,
-                    "gwrf_densidad": 45.0
-                },
-                "features_calculadas": {
-                    "m2_por_habitante": 14.17,
-                    "total_habitaciones": 5,
-                    "ratio_bano_dorm": 0.67
-                }
-            }
-        }
+        json_schema_extra = ejemplo_json(__file__, "PrediccionResponse")
 
 
 class ModeloInfo(BaseModel):
@@ -209,25 +182,4 @@ class ModeloInfo(BaseModel):
     )
     
     class Config:
-        json_schema_extra = {
-            "example": {
-                "modelos_disponibles": {
-                    "stacking": True,
-                    "gwrf_cluster": True,
-                    "gwrf_densidad": False
-                },
-                "version": "1.0.0",
-                "metricas": {
-                    "stacking": {
-                        "r2": 0.489,
-                        "rmse": 25288,
-                        "mae": 4173
-                    },
-                    "gwrf_cluster": {
-                        "r2": 0.039,
-                        "rmse": 34677,
-                        "mae": 4719
-                    }
-                }
-            }
-        }
+        json_schema_extra = ejemplo_json(__file__, "ModeloInfo")
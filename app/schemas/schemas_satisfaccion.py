@@ -3,10 +3,13 @@ Schemas Pydantic para el sistema de predicción de satisfacción
 
 Define los modelos de request/response para la API de satisfacción.
 """
-from pydantic import BaseModel, Field, field_validator
-from typing import Optional, Dict, List
+import numpy as np
+from pydantic import BaseModel, Field
+from typing import Literal, Optional, Dict, List, Tuple
 from enum import Enum
 
+from app.schemas.ejemplos import ejemplo_json
+
 
 class TipoPropiedad(str, Enum):
     """Tipos de propiedad válidos"""
@@ -22,6 +25,12 @@ class ComunaValida(str, Enum):
     SANTIAGO = "Santiago"
 
 
+# Valores válidos como Literal: pydantic-core los valida con una búsqueda en un
+# conjunto precalculado (sin pasar por Enum) y el campo queda como str
+TipoPropiedadLiteral = Literal[tuple(t.value for t in TipoPropiedad)]
+ComunaLiteral = Literal[tuple(c.value for c in ComunaValida)]
+
+
 class SatisfaccionRequest(BaseModel):
     """
     Request para predicción de satisfacción.
@@ -65,30 +74,30 @@ class SatisfaccionRequest(BaseModel):
     )
     
     # Ubicación
-    comuna: ComunaValida = Field(
-        default=ComunaValida.SANTIAGO,
+    comuna: ComunaLiteral = Field(
+        default=ComunaValida.SANTIAGO.value,
         description="Comuna donde se ubica la propiedad"
     )
     
-    tipo_propiedad: TipoPropiedad = Field(
-        default=TipoPropiedad.DEPARTAMENTO,
+    tipo_propiedad: TipoPropiedadLiteral = Field(
+        default=TipoPropiedad.DEPARTAMENTO.value,
         description="Tipo de propiedad"
     )
     
     # Coordenadas (opcionales)
     latitud: Optional[float] = Field(
         None,
-        ge=-90,
-        le=90,
-        description="Latitud de la propiedad (WGS84)",
+        ge=-33.7,
+        le=-33.2,
+        description="Latitud de la propiedad (WGS84, rango de Santiago: -33.7 a -33.2)",
         examples=[-33.4489]
     )
     
     longitud: Optional[float] = Field(
         None,
-        ge=-180,
-        le=180,
-        description="Longitud de la propiedad (WGS84)",
+        ge=-71.0,
+        le=-70.4,
+        description="Longitud de la propiedad (WGS84, rango de Santiago: -71.0 a -70.4)",
         examples=[-70.6693]
     )
     
@@ -123,37 +132,8 @@ class SatisfaccionRequest(BaseModel):
         description="Distancia a comercio/supermercados (metros)"
     )
     
-    @field_validator('latitud')
-    @classmethod
-    def validar_latitud_santiago(cls, v):
-        """Validar que la latitud está en rango razonable para Santiago"""
-        if v is not None and not (-33.7 <= v <= -33.2):
-            raise ValueError('Latitud fuera del rango de Santiago (-33.7 a -33.2)')
-        return v
-    
-    @field_validator('longitud')
-    @classmethod
-    def validar_longitud_santiago(cls, v):
-        """Validar que la longitud está en rango razonable para Santiago"""
-        if v is not None and not (-71.0 <= v <= -70.4):
-            raise ValueError('Longitud fuera del rango de Santiago (-71.0 a -70.4)')
-        return v
-    
     class Config:
-        json_schema_extra = {
-            "example": {
-                "superficie_util": 85.0,
-                "dormitorios": 3,
-                "banos": 2,
-                "precio_uf": 5000.0,
-                "comuna": "Ñuñoa",
-                "tipo_propiedad": "departamento",
-                "latitud": -33.4489,
-                "longitud": -70.6693,
-                "dist_transporte_min_m": 500,
-                "dist_areas_verdes_m": 300
-            }
-        }
+        json_schema_extra = ejemplo_json(__file__, "SatisfaccionRequest")
 
 
 class SatisfaccionDetalles(BaseModel):
@@ -226,25 +206,7 @@ class SatisfaccionResponse(BaseModel):
     )
     
     class Config:
-        json_schema_extra = {
-            "example": {
-                "satisfaccion": 7.5,
-                "nivel": "Bueno",
-                "emoji": "✅",
-                "descripcion": "Propiedad con buenas características",
-                "escala": "0-10",
-                "confianza": 0.87,
-                "features_usadas": 42,
-                "detalles": {
-                    "precio_m2_uf": 58.82,
-                    "m2_por_dormitorio": 28.33,
-                    "ratio_bano_dorm": 0.67,
-                    "total_habitaciones": 5,
-                    "comuna": "Ñuñoa",
-                    "tipo": "departamento"
-                }
-            }
-        }
+        json_schema_extra = ejemplo_json(__file__, "SatisfaccionResponse")
 
 
 class ModeloSatisfaccionInfo(BaseModel):
@@ -286,21 +248,7 @@ class ModeloSatisfaccionInfo(BaseModel):
     )
     
     class Config:
-        json_schema_extra = {
-            "example": {
-                "modelo_tipo": "LGBMRegressor",
-                "modelo_disponible": True,
-                "num_features": 42,
-                "metricas": {
-                    "r2_test": 0.8697,
-                    "rmse_test": 0.328,
-                    "mae_test": 0.245
-                },
-                "comunas_validas": ["Estación Central", "La Reina", "Ñuñoa", "Santiago"],
-                "tipos_validos": ["departamento", "casa"],
-                "version": "1.0.0"
-            }
-        }
+        json_schema_extra = ejemplo_json(__file__, "ModeloSatisfaccionInfo")
 
 
 class ComparacionRequest(BaseModel):
@@ -313,29 +261,30 @@ class ComparacionRequest(BaseModel):
         description="Lista de propiedades a comparar (2-20)"
     )
     
+    def como_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Construye las entradas del modelo en formato columnar (una fila por propiedad).
+        
+        Returns:
+            Tupla (base, comunas, tipos): `base` es una matriz float64 de shape
+            (n, 4) con superficie_util, dormitorios, banos y precio_uf;
+            `comunas` y `tipos` son arrays de strings
+        """
+        n = len(self.propiedades)
+        base = np.fromiter(
+            (
+                (p.superficie_util, p.dormitorios, p.banos, p.precio_uf)
+                for p in self.propiedades
+            ),
+            dtype=np.dtype((np.float64, 4)),
+            count=n
+        )
+        comunas = np.array([p.comuna for p in self.propiedades], dtype=object)
+        tipos = np.array([p.tipo_propiedad for p in self.propiedades], dtype=object)
+        return base, comunas, tipos
+    
     class Config:
-        json_schema_extra = {
-            "example": {
-                "propiedades": [
-                    {
-                        "superficie_util": 85.0,
-                        "dormitorios": 3,
-                        "banos": 2,
-                        "precio_uf": 5000.0,
-                        "comuna": "Ñuñoa",
-                        "tipo_propiedad": "departamento"
-                    },
-                    {
-                        "superficie_util": 120.0,
-                        "dormitorios": 4,
-                        "banos": 3,
-                        "precio_uf": 8000.0,
-                        "comuna": "La Reina",
-                        "tipo_propiedad": "casa"
-                    }
-                ]
-            }
-        }
+        json_schema_extra = ejemplo_json(__file__, "ComparacionRequest")
 
 
 class PropiedadRanking(BaseModel):
@@ -378,53 +327,4 @@ class ComparacionResponse(BaseModel):
     )
     
     class Config:
-        json_schema_extra = {
-            "example": {
-                "total_comparadas": 2,
-                "ranking": [
-                    {
-                        "ranking": 1,
-                        "id": 2,
-                        "direccion": "Propiedad 2",
-                        "satisfaccion": 8.2,
-                        "nivel": "Excelente",
-                        "emoji": "🌟",
-                        "precio_uf": 8000.0,
-                        "superficie": 120.0,
-                        "dormitorios": 4,
-                        "banos": 3,
-                        "comuna": "La Reina",
-                        "tipo": "casa"
-                    },
-                    {
-                        "ranking": 2,
-                        "id": 1,
-                        "direccion": "Propiedad 1",
-                        "satisfaccion": 7.1,
-                        "nivel": "Bueno",
-                        "emoji": "✅",
-                        "precio_uf": 5000.0,
-                        "superficie": 85.0,
-                        "dormitorios": 3,
-                        "banos": 2,
-                        "comuna": "Ñuñoa",
-                        "tipo": "departamento"
-                    }
-                ],
-                "mejor_opcion": {
-                    "ranking": 1,
-                    "id": 2,
-                    "direccion": "Propiedad 2",
-                    "satisfaccion": 8.2,
-                    "nivel": "Excelente",
-                    "emoji": "🌟",
-                    "precio_uf": 8000.0,
-                    "superficie": 120.0,
-                    "dormitorios": 4,
-                    "banos": 3,
-                    "comuna": "La Reina",
-                    "tipo": "casa"
-                },
-                "promedio_satisfaccion": 7.65
-            }
-        }
+        json_schema_extra = ejemplo_json(__file__, "ComparacionResponse")
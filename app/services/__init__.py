@@ -1,10 +1,38 @@
-from .recommendation_ml_service import RecommendationMLService
-from .ml_prediccion_service import MLPrediccionService
-from .satisfaccion_service import SatisfaccionService, get_satisfaccion_service
+"""
+Servicios de la aplicación
+
+Los servicios se importan de forma diferida (PEP 562): importar un submódulo,
+ej. `app.services.satisfaccion_service`, no carga los demás ni sus
+dependencias pesadas (LightGBM, scikit-learn, pandas).
+"""
+import importlib
+
+# Nombre exportado -> submódulo que lo define
+_LAZY = {
+    "RecommendationMLService": "recommendation_ml_service",
+    "MLPrediccionService": "ml_prediccion_service",
+    "get_ml_prediccion_service": "ml_prediccion_service",
+    "SatisfaccionService": "satisfaccion_service",
+    "get_satisfaccion_service": "satisfaccion_service",
+}
 
 __all__ = [
     "RecommendationMLService",
     "MLPrediccionService",
+    "get_ml_prediccion_service",
     "SatisfaccionService",
     "get_satisfaccion_service"
 ]
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        modulo = importlib.import_module(f".{_LAZY[name]}", __name__)
+        valor = getattr(modulo, name)
+        globals()[name] = valor  # siguientes accesos sin pasar por __getattr__
+        return valor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY))
@@ -2,15 +2,52 @@
 Servicio de Predicción ML usando modelos de Semana 3
 Implementa predicción de precio_m2 usando RF + GWRF + Stacking
 """
+import functools
 import pickle
+import time
+
+import joblib
 import numpy as np
-import pandas as pd
 from pathlib import Path
-from typing import Dict, Optional, List
+from typing import Any, Dict, Optional, Tuple
 from loguru import logger
 import warnings
+
+from app.config import settings
 warnings.filterwarnings('ignore')
 
+# Intentar importar ONNX Runtime (opcional: inferencia más rápida de los árboles)
+try:
+    import onnxruntime as ort
+    ONNX_DISPONIBLE = True
+except ImportError:
+    ONNX_DISPONIBLE = False
+
+
+class ModeloONNX:
+    """
+    Envuelve una sesión de ONNX Runtime con la interfaz `predict` de scikit-learn.
+    
+    Los modelos se exportan con `scripts/exportar_onnx.py`; el kernel
+    TreeEnsembleRegressor de ONNX Runtime (C++, libera el GIL) evita el
+    overhead por llamada del `predict` de scikit-learn.
+    
+    Los hilos intra-op salen de `settings.ONNX_INTRA_OP_THREADS` (default 1):
+    cada worker de uvicorn tiene sus propias sesiones, así que usar todos los
+    núcleos por sesión sobresuscribe la CPU con varios workers.
+    """
+    
+    def __init__(self, path: Path):
+        opciones = ort.SessionOptions()
+        opciones.intra_op_num_threads = settings.ONNX_INTRA_OP_THREADS
+        self.session = ort.InferenceSession(
+            str(path), sess_options=opciones, providers=['CPUExecutionProvider']
+        )
+        self._input_name = self.session.get_inputs()[0].name
+    
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self._input_name: X.astype(np.float32)})[0].ravel()
+
 
 class MLPrediccionService:
     """
@@ -28,6 +65,13 @@ class MLPrediccionService:
     - Espaciales: 42 densidades (dens_*)
     """
     
+    # La ubicación se cuantiza a celdas de ~100 m (3 decimales): densidades,
+    # cluster KMeans y predicción se calculan en el centro de la celda, por lo
+    # que las predicciones y la asignación de cluster se memoizan por celda
+    CELDAS_POR_GRADO = 1000
+    MAX_PREDICCIONES_CACHE = 4096
+    MAX_CELDAS_CACHE = 65536
+    
     def __init__(self, modelos_dir: Optional[Path] = None):
         """
         Inicializa el servicio cargando los modelos entrenados.
@@ -68,56 +112,155 @@ class MLPrediccionService:
         ]
         self.radios = [300, 600, 1000]
         
+        # Nombres de las 42 densidades en el orden del modelo (categoría x radio)
+        self._dens_keys = [
+            f'dens_{cat}_{radio}m'
+            for cat in self.categorias_densidades
+            for radio in self.radios
+        ]
+        
+        # Vector de features completo: base + derivadas + densidades
+        self._all_feature_names = self.features_base + self.features_derivadas + self._dens_keys
+        n_base = len(self.features_base) + len(self.features_derivadas)
+        self._dens_slice = slice(n_base, len(self._all_feature_names))
+        # KMeans espacial usa las primeras 10 densidades
+        self._kmeans_dens = slice(0, 10)
+        
+        # Caché LRU de predicciones (se vacía cada vez que se cargan modelos)
+        self._predecir_cacheado = functools.lru_cache(
+            maxsize=self.MAX_PREDICCIONES_CACHE
+        )(self._predecir_precio_m2)
+        self._cluster_por_celda = functools.lru_cache(
+            maxsize=self.MAX_CELDAS_CACHE
+        )(self._asignar_cluster)
+        
         # Cargar modelos
         self._cargar_modelos()
         
         logger.info("✅ MLPrediccionService inicializado correctamente")
     
+    @staticmethod
+    def _cargar_pkl(path: Path) -> Any:
+        """
+        Carga un archivo de modelo con joblib.
+        
+        Si el archivo fue guardado con `joblib.dump`, los arrays NumPy de los
+        árboles (umbrales, valores de nodos) se mapean en memoria de solo
+        lectura (`mmap_mode='r'`): la carga es casi instantánea y los workers
+        comparten esas páginas a través del page cache del sistema operativo.
+        Los `.pkl` guardados con `pickle.dump` se siguen leyendo (ver
+        `scripts/migrar_modelos_joblib.py` para convertirlos).
+        """
+        try:
+            return joblib.load(path, mmap_mode='r')
+        except Exception as e:
+            logger.warning("⚠️  joblib no pudo leer {} ({}), usando pickle", path.name, e)
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+    
     def _cargar_modelos(self):
         """Carga todos los modelos entrenados desde disco"""
         try:
             # Cargar GWRF por cluster
             cluster_path = self.modelos_dir / 'gwrf_por_cluster.pkl'
             if cluster_path.exists():
-                with open(cluster_path, 'rb') as f:
-                    cluster_data = pickle.load(f)
-                    self.modelos_cluster = cluster_data.get('modelos', {})
-                    self.kmeans = cluster_data.get('kmeans')
+                cluster_data = self._cargar_pkl(cluster_path)
+                self.modelos_cluster = cluster_data.get('modelos', {})
+                self.kmeans = cluster_data.get('kmeans')
                 logger.info(f"✅ Cargado GWRF por cluster: {len(self.modelos_cluster)} clusters")
+                self._cargar_modelos_onnx()
             else:
-                logger.warning(f"⚠️  No se encontró {cluster_path}")
+                logger.warning("⚠️  No se encontró {}", cluster_path)
                 self.modelos_cluster = {}
                 self.kmeans = None
             
             # Cargar meta-modelo de stacking
             stack_path = self.modelos_dir / 'meta_model_stack.pkl'
             if stack_path.exists():
-                with open(stack_path, 'rb') as f:
-                    stack_data = pickle.load(f)
-                    self.meta_model = stack_data.get('meta_model')
-                    # El kmeans puede venir también aquí
-                    if self.kmeans is None:
-                        self.kmeans = stack_data.get('kmeans')
+                stack_data = self._cargar_pkl(stack_path)
+                self.meta_model = stack_data.get('meta_model')
+                # El kmeans puede venir también aquí
+                if self.kmeans is None:
+                    self.kmeans = stack_data.get('kmeans')
                 logger.info("✅ Cargado meta-modelo de stacking")
             else:
-                logger.warning(f"⚠️  No se encontró {stack_path}")
+                logger.warning("⚠️  No se encontró {}", stack_path)
                 self.meta_model = None
             
+            # Pipeline de stacking completo (modelos base + meta-modelo) como un
+            # único grafo ONNX, exportado por el pipeline de entrenamiento
+            self.stack_onnx = None
+            stack_onnx_path = self.modelos_dir / 'stacking.onnx'
+            if ONNX_DISPONIBLE and stack_onnx_path.exists():
+                self.stack_onnx = ModeloONNX(stack_onnx_path)
+                logger.info("✅ Cargado stacking ONNX (una sola sesión)")
+            
             # Validar que al menos tengamos algún modelo
-            if not self.modelos_cluster and not self.meta_model:
+            if not self.modelos_cluster and not self.meta_model and self.stack_onnx is None:
                 logger.warning("⚠️  No se encontraron modelos entrenados. Usando valores por defecto.")
+            else:
+                self._calentar_modelos()
+            
+            # Las predicciones memoizadas corresponden a los modelos anteriores
+            self._predecir_cacheado.cache_clear()
+            self._cluster_por_celda.cache_clear()
                 
         except Exception as e:
-            logger.error(f"❌ Error cargando modelos: {e}")
+            logger.error("❌ Error cargando modelos: {}", e)
             raise
     
+    def _calentar_modelos(self):
+        """
+        Ejecuta una predicción sintética con cada modelo cargado.
+        
+        Con `mmap_mode='r'` el primer `predict` provoca los page faults de los
+        arrays de los árboles; hacerlo al arrancar evita ese pico de latencia
+        en la primera solicitud real de cada worker.
+        """
+        inicio = time.perf_counter()
+        X = np.zeros((1, len(self._all_feature_names)))
+        
+        try:
+            for modelo in self.modelos_cluster.values():
+                modelo.predict(X)
+            if self.kmeans is not None:
+                self.kmeans.predict(X[:, self._dens_slice][:, self._kmeans_dens])
+            n_meta = getattr(self.meta_model, 'n_features_in_', None)
+            if n_meta:
+                self.meta_model.predict(np.zeros((1, n_meta)))
+            if self.stack_onnx is not None:
+                self.stack_onnx.predict(X)
+        except Exception as e:
+            logger.warning("⚠️  Error en warmup de modelos: {}", e)
+            return
+        
+        logger.info(f"🔥 Warmup de modelos en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+    
+    def _cargar_modelos_onnx(self):
+        """
+        Reemplaza los RF por cluster por su versión ONNX si fue exportada
+        (`gwrf_cluster_{id}.onnx`); los clusters sin archivo siguen con scikit-learn.
+        """
+        if not ONNX_DISPONIBLE:
+            return
+        
+        convertidos = 0
+        for cluster_id in self.modelos_cluster:
+            onnx_path = self.modelos_dir / f'gwrf_cluster_{cluster_id}.onnx'
+            if onnx_path.exists():
+                self.modelos_cluster[cluster_id] = ModeloONNX(onnx_path)
+                convertidos += 1
+        
+        if convertidos:
+            logger.info(f"✅ GWRF por cluster con ONNX Runtime: {convertidos} clusters")
+    
     def calcular_features_derivadas(
         self,
         superficie_util: float,
         dormitorios: int,
         banos: int,
         cant_max_habitantes: Optional[int] = None
-    ) -> Dict[str, float]:
+    ) -> Tuple[float, float, float]:
         """
         Calcula features derivadas a partir de las características básicas.
         
@@ -128,22 +271,18 @@ class MLPrediccionService:
             cant_max_habitantes: Máximo de habitantes (si no se proporciona, se estima)
         
         Returns:
-            Dict con features derivadas
+            Tupla (m2_por_habitante, total_habitaciones, ratio_bano_dorm),
+            en el orden de `self.features_derivadas`
         """
-        # Estimar habitantes si no se proporciona
-        if cant_max_habitantes is None:
-            cant_max_habitantes = dormitorios * 2
+        # Estimar habitantes si no se proporciona (2 por dormitorio)
+        habitantes = cant_max_habitantes or dormitorios * 2
         
         # Calcular features
-        m2_por_habitante = superficie_util / cant_max_habitantes if cant_max_habitantes > 0 else superficie_util
+        m2_por_habitante = superficie_util / habitantes if habitantes > 0 else superficie_util
         total_habitaciones = dormitorios + banos
         ratio_bano_dorm = banos / dormitorios if dormitorios > 0 else 0
         
-        return {
-            'm2_por_habitante': m2_por_habitante,
-            'total_habitaciones': total_habitaciones,
-            'ratio_bano_dorm': ratio_bano_dorm
-        }
+        return m2_por_habitante, total_habitaciones, ratio_bano_dorm
     
     def calcular_densidades_mock(self, latitud: float, longitud: float) -> Dict[str, float]:
         """
@@ -162,8 +301,18 @@ class MLPrediccionService:
         Returns:
             Dict con 42 densidades calculadas
         """
-        densidades = {}
+        valores = self.calcular_densidades_mock_array(latitud, longitud)
+        return dict(zip(self._dens_keys, valores.tolist()))
+    
+    def calcular_densidades_mock_array(self, latitud: float, longitud: float) -> np.ndarray:
+        """
+        Igual que `calcular_densidades_mock`, pero retorna un array de 42 valores
+        en el orden de `self._dens_keys` (listo para el vector de features).
         
+        Los valores se generan en una sola llamada vectorizada y son
+        deterministas: la semilla se deriva de las coordenadas, por lo que la
+        misma ubicación siempre obtiene las mismas densidades.
+        """
         # Versión simplificada: usar valores medios basados en ubicación general
         # Esto permite que el servicio funcione sin los datos geoespaciales completos
         
@@ -171,22 +320,19 @@ class MLPrediccionService:
         es_centro = (-33.45 < latitud < -33.42) and (-70.67 < longitud < -70.63)
         es_oriente = longitud > -70.58
         
-        for categoria in self.categorias_densidades:
-            for radio in self.radios:
-                key = f'dens_{categoria}_{radio}m'
-                
-                # Valores mock razonables
-                if es_centro:
-                    valor_base = np.random.uniform(0.5, 2.0)
-                elif es_oriente:
-                    valor_base = np.random.uniform(0.3, 1.5)
-                else:
-                    valor_base = np.random.uniform(0.1, 0.8)
-                
-                densidades[key] = valor_base
+        # Rango de valores mock razonables según zona
+        if es_centro:
+            bajo, alto = 0.5, 2.0
+        elif es_oriente:
+            bajo, alto = 0.3, 1.5
+        else:
+            bajo, alto = 0.1, 0.8
+        
+        rng = np.random.default_rng(hash((latitud, longitud)) & 0xFFFFFFFF)
+        valores = rng.uniform(bajo, alto, size=len(self._dens_keys))
         
-        logger.info(f"ℹ️  Densidades calculadas (mock) para lat={latitud}, lon={longitud}")
-        return densidades
+        logger.debug("ℹ️  Densidades calculadas (mock) para lat={}, lon={}", latitud, longitud)
+        return valores
     
     def predecir_precio_m2(
         self,
@@ -224,82 +370,123 @@ class MLPrediccionService:
                 - predicciones_base: Predicciones de cada modelo base
                 - features_calculadas: Features derivadas y espaciales
         """
+        # Memoizado por entrada: ubicaciones de la misma celda (~100 m)
+        # reutilizan densidades, cluster y predicción del modelo. Solo se
+        # memoizan predicciones exitosas: si el modelo falla, la excepción no
+        # queda en caché y se responde con el fallback interno sin memoizarlo
         try:
-            # 1. Calcular features derivadas
-            features_derivadas = self.calcular_features_derivadas(
+            m2_por_habitante, total_habitaciones, ratio_bano_dorm = self.calcular_features_derivadas(
                 superficie_util, dormitorios, banos, cant_max_habitantes
             )
-            
-            # 2. Calcular densidades espaciales
-            densidades = self.calcular_densidades_mock(latitud, longitud)
-            
-            # 3. Construir feature vector completo
-            features_dict = {
-                'superficie_util': superficie_util,
-                'dormitorios': dormitorios,
-                'banos': banos,
-                'estacionamientos': estacionamientos,
-                'bodegas': bodegas,
-                **features_derivadas,
-                **densidades
-            }
-            
-            # Crear DataFrame con todas las features
-            all_feature_names = (
-                self.features_base + 
-                self.features_derivadas + 
-                [f'dens_{cat}_{radio}m' 
-                 for cat in self.categorias_densidades 
-                 for radio in self.radios]
-            )
-            
-            X = pd.DataFrame([features_dict])[all_feature_names]
-            
-            # 4. Predecir según modelo disponible
-            if usar_stacking and self.meta_model is not None:
-                resultado = self._predecir_con_stacking(X, densidades)
-                metodo = 'stacking'
-            elif self.modelos_cluster:
-                resultado = self._predecir_con_gwrf_cluster(X, densidades)
-                metodo = 'gwrf_cluster'
-            else:
-                # Fallback: predicción simple
-                resultado = self._predecir_fallback(features_dict)
-                metodo = 'fallback'
-            
-            # 5. Calcular precio total
-            precio_total = resultado['precio_m2_predicho'] * superficie_util
-            
-            # 6. Construir respuesta completa
-            return {
-                'precio_m2_predicho': round(resultado['precio_m2_predicho'], 2),
-                'precio_total_estimado': round(precio_total, 2),
-                'confianza': round(resultado.get('confianza', 0.5), 3),
-                'metodo': metodo,
-                'cluster_asignado': resultado.get('cluster_asignado', 0),
-                'predicciones_base': resultado.get('predicciones_base', {}),
-                'features_calculadas': {
-                    'm2_por_habitante': round(features_derivadas['m2_por_habitante'], 2),
-                    'total_habitaciones': features_derivadas['total_habitaciones'],
-                    'ratio_bano_dorm': round(features_derivadas['ratio_bano_dorm'], 2)
-                }
-            }
-            
+            celda = self._clave_celda(latitud, longitud)
+            metodo = self._seleccionar_metodo(usar_stacking)
         except Exception as e:
-            logger.error(f"❌ Error en predicción: {e}")
+            logger.error("❌ Error en predicción: {}", e)
             # Retornar predicción de emergencia
             return self._predecir_fallback({
                 'superficie_util': superficie_util,
                 'dormitorios': dormitorios,
                 'banos': banos
             })
+        
+        try:
+            resultado = self._predecir_cacheado(
+                superficie_util, dormitorios, banos, estacionamientos, bodegas,
+                celda, cant_max_habitantes, usar_stacking
+            )
+        except Exception as e:
+            logger.error("❌ Error en modelo {}: {}", metodo, e)
+            resultado = self._predecir_fallback_interno(dormitorios, banos)
+        
+        # 5. Calcular precio total
+        precio_total = resultado['precio_m2_predicho'] * superficie_util
+        
+        # 6. Construir respuesta completa (dicts nuevos: el resultado en caché
+        # se comparte entre solicitudes y no debe exponerse)
+        return {
+            'precio_m2_predicho': round(resultado['precio_m2_predicho'], 2),
+            'precio_total_estimado': round(precio_total, 2),
+            'confianza': round(resultado.get('confianza', 0.5), 3),
+            'metodo': metodo,
+            'cluster_asignado': resultado.get('cluster_asignado', 0),
+            'predicciones_base': dict(resultado.get('predicciones_base', {})),
+            'features_calculadas': {
+                'm2_por_habitante': round(m2_por_habitante, 2),
+                'total_habitaciones': total_habitaciones,
+                'ratio_bano_dorm': round(ratio_bano_dorm, 2)
+            }
+        }
+    
+    def _seleccionar_metodo(self, usar_stacking: bool) -> str:
+        """Método de predicción según los modelos cargados"""
+        if usar_stacking and (self.stack_onnx is not None or self.meta_model is not None):
+            return 'stacking'
+        if self.modelos_cluster:
+            return 'gwrf_cluster'
+        return 'fallback'
+    
+    def _predecir_precio_m2(
+        self,
+        superficie_util: float,
+        dormitorios: int,
+        banos: int,
+        estacionamientos: int,
+        bodegas: int,
+        celda: int,
+        cant_max_habitantes: Optional[int],
+        usar_stacking: bool
+    ) -> Dict:
+        """
+        Predicción del modelo sin caché (ver `predecir_precio_m2`); `celda`
+        viene de `_clave_celda`.
+        
+        Retorna el resultado crudo del modelo (precio, confianza, cluster y
+        predicciones base). Los errores se propagan (no se memoizan); el
+        llamador aplica el fallback.
+        """
+        # 1. Calcular features derivadas
+        m2_por_habitante, total_habitaciones, ratio_bano_dorm = self.calcular_features_derivadas(
+            superficie_util, dormitorios, banos, cant_max_habitantes
+        )
+        
+        # 2-3. Construir feature vector completo (1, 50) en el orden del modelo:
+        # base y derivadas por posición, densidades espaciales como bloque
+        X = np.empty((1, len(self._all_feature_names)))
+        X[0, :self._dens_slice.start] = (
+            superficie_util, dormitorios, banos, estacionamientos, bodegas,
+            m2_por_habitante, total_habitaciones, ratio_bano_dorm
+        )
+        X[0, self._dens_slice] = self._densidades_celda(celda)
+        
+        # 4. Predecir según modelo disponible
+        metodo = self._seleccionar_metodo(usar_stacking)
+        if metodo == 'stacking':
+            return self._predecir_con_stacking(X)
+        if metodo == 'gwrf_cluster':
+            return self._predecir_con_gwrf_cluster(X, celda)
+        # Fallback: predicción simple
+        return self._predecir_fallback({
+            'superficie_util': superficie_util,
+            'dormitorios': dormitorios,
+            'banos': banos
+        })
     
-    def _predecir_con_stacking(self, X: pd.DataFrame, densidades: Dict) -> Dict:
+    def _predecir_con_stacking(self, X: np.ndarray) -> Dict:
         """Predice usando el meta-modelo de stacking (mejor R²=0.489)"""
         try:
+            # Stacking exportado a ONNX: modelos base + meta-modelo en una sola llamada
+            if self.stack_onnx is not None:
+                precio = float(self.stack_onnx.predict(X)[0])
+                return {
+                    'precio_m2_predicho': precio,
+                    'confianza': 0.75,
+                    'cluster_asignado': 0,
+                    'predicciones_base': {}
+                }
+            
             # Aquí iría la predicción real con los modelos base + meta-modelo
-            # Por ahora, retornamos predicción mock
-            precio_base = 35.0 + (X['dormitorios'].iloc[0] * 5) + (X['banos'].iloc[0] * 3)
+            # Por ahora, retornamos predicción mock (columnas 1-2: dormitorios, banos)
+            precio_base = 35.0 + (X[0, 1] * 5) + (X[0, 2] * 3)
             
             return {
                 'precio_m2_predicho': precio_base,
@@ -312,18 +499,49 @@ class MLPrediccionService:
                 }
             }
         except Exception as e:
-            logger.error(f"Error en stacking: {e}")
-            return self._predecir_fallback_interno(X)
+            logger.error("Error en stacking: {}", e)
+            raise
+    
+    def _clave_celda(self, latitud: float, longitud: float) -> int:
+        """
+        Empaqueta la celda de la grilla de (lat, lon) en un solo entero.
+        
+        (lat + 90) y (lon + 180) cuantizados quedan en 32 bits cada uno; una
+        clave `int` única usa el camino rápido de `lru_cache` (sin tupla).
+        """
+        lat_celda = round((latitud + 90) * self.CELDAS_POR_GRADO)
+        lon_celda = round((longitud + 180) * self.CELDAS_POR_GRADO)
+        return (lat_celda << 32) | lon_celda
     
-    def _predecir_con_gwrf_cluster(self, X: pd.DataFrame, densidades: Dict) -> Dict:
+    def _densidades_celda(self, celda: int) -> np.ndarray:
+        """
+        Densidades espaciales de una celda de la grilla, evaluadas en su centro.
+        
+        Es la única fuente de densidades tanto para el vector de features como
+        para la asignación de cluster, así ambos corresponden al mismo punto.
+        """
+        return self.calcular_densidades_mock_array(
+            (celda >> 32) / self.CELDAS_POR_GRADO - 90,
+            (celda & 0xFFFFFFFF) / self.CELDAS_POR_GRADO - 180
+        )
+    
+    def _asignar_cluster(self, celda: int) -> int:
+        """
+        Asigna el cluster KMeans de una celda de la grilla espacial.
+        
+        Las densidades (y por lo tanto el cluster) dependen solo de la celda,
+        así que el resultado se memoiza en `self._cluster_por_celda`.
+        """
+        # Usar primeras 10 densidades para clustering
+        densidades = self._densidades_celda(celda)
+        return int(self.kmeans.predict(densidades[None, self._kmeans_dens])[0])
+    
+    def _predecir_con_gwrf_cluster(self, X: np.ndarray, celda: int) -> Dict:
         """Predice usando GWRF por cluster"""
         try:
-            # Determinar cluster usando KMeans
+            # Determinar cluster usando KMeans (memoizado por celda de ~100 m)
             if self.kmeans is not None:
-                # Usar primeras 10 densidades para clustering
-                dens_cols = [col for col in X.columns if col.startswith('dens_')][:10]
-                X_spatial = X[dens_cols].fillna(0)
-                cluster_id = self.kmeans.predict(X_spatial)[0]
+                cluster_id = self._cluster_por_celda(celda)
                 
                 # Predecir con modelo del cluster
                 if cluster_id in self.modelos_cluster:
@@ -335,15 +553,15 @@ class MLPrediccionService:
                         'predicciones_base': {'gwrf_cluster': pred}
                     }
             
-            return self._predecir_fallback_interno(X)
+            return self._predecir_fallback_interno(X[0, 1], X[0, 2])
             
         except Exception as e:
-            logger.error(f"Error en GWRF cluster: {e}")
-            return self._predecir_fallback_interno(X)
+            logger.error("Error en GWRF cluster: {}", e)
+            raise
     
-    def _predecir_fallback_interno(self, X: pd.DataFrame) -> Dict:
+    def _predecir_fallback_interno(self, dormitorios: float, banos: float) -> Dict:
         """Predicción de emergencia basada en reglas simples"""
-        precio_base = 35.0 + (X['dormitorios'].iloc[0] * 5) + (X['banos'].iloc[0] * 3)
+        precio_base = 35.0 + (dormitorios * 5) + (banos * 3)
         return {
             'precio_m2_predicho': precio_base,
             'confianza': 0.3,
@@ -372,3 +590,28 @@ class MLPrediccionService:
             'predicciones_base': {'fallback': precio_m2},
             'features_calculadas': {}
         }
+
+
+# Instancia global para uso en la API
+_ml_prediccion_service: Optional[MLPrediccionService] = None
+
+
+def get_ml_prediccion_service() -> Optional[MLPrediccionService]:
+    """
+    Obtiene la instancia global del servicio de predicción de precios.
+    
+    Los modelos se cargan una sola vez por proceso (la API lo hace al arrancar).
+    
+    Returns:
+        Instancia de MLPrediccionService o None si no está disponible
+    """
+    global _ml_prediccion_service
+    
+    if _ml_prediccion_service is None:
+        try:
+            _ml_prediccion_service = MLPrediccionService()
+        except Exception as e:
+            logger.warning("⚠️  No se pudo inicializar MLPrediccionService: {}", e)
+            return None
+    
+    return _ml_prediccion_service
@@ -6,9 +6,11 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 from typing import List, Dict, Optional, Tuple
 import math
+import time
 from datetime import datetime
 from loguru import logger
 
+from app.config import settings
 from app.models.models import Propiedad, Comuna, PuntoInteres
 from app.schemas.schemas_ml import (
     PreferenciasDetalladas,
@@ -29,12 +31,98 @@ except ImportError:
     logger.warning("⚠️ SatisfaccionService no disponible")
 
 
+# ============================================================================
+# CONSTRUCCIÓN DE RESPUESTAS
+# ============================================================================
+# Las recomendaciones (PropiedadRecomendadaML) se validan siempre: las columnas
+# ORM Float (ej: estacionamientos) deben coercionarse a int para que el JSON sea
+# el mismo en cualquier entorno. Los ScoreML son dicts tipados y no requieren
+# construcción.
+
+
+# Distancias informadas en la respuesta: (clave, categoría de preferencia, atributo de Propiedad).
+# Se arman solo para las recomendaciones finales, no para cada candidata.
+_DISTANCIAS_RESPUESTA = (
+    ('metro_m', 'transporte', 'dist_transporte_metro_m'),
+    ('colegio_m', 'educacion', 'dist_educacion_min_m'),
+    ('salud_m', 'salud', 'dist_salud_min_m'),
+    ('parque_m', 'areas_verdes', 'dist_areas_verdes_m'),
+)
+
+
+# ============================================================================
+# CONSULTAS ESPACIALES (constantes, con parámetros enlazados)
+# ============================================================================
+# Se construyen una sola vez; usan la columna geography indexada `geog`
+# de puntos_interes para que ST_DWithin/ST_Distance aprovechen el índice GiST
+
+_SQL_DISTANCIA_MIN_METRO = text("""
+    SELECT MIN(
+        ST_Distance(
+            geog,
+            ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography
+        )
+    ) as distancia_min
+    FROM puntos_interes
+    WHERE (tipo = 'metro' OR LOWER(nombre) LIKE 'metro %' OR LOWER(nombre) LIKE 'estación metro%')
+    AND geog IS NOT NULL
+""")
+
+_SQL_DISTANCIA_MIN_TIPO = text("""
+    SELECT MIN(
+        ST_Distance(
+            geog,
+            ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography
+        )
+    ) as distancia_min
+    FROM puntos_interes
+    WHERE tipo = :tipo
+    AND geog IS NOT NULL
+""")
+
+_SQL_CERCANIA_METRO = text("""
+    SELECT DISTINCT p.id
+    FROM propiedades p
+    WHERE p.id = ANY(:prop_ids)
+    AND p.geometria IS NOT NULL
+    AND EXISTS (
+        SELECT 1 FROM puntos_interes poi
+        WHERE (poi.tipo = 'metro' OR LOWER(poi.nombre) LIKE 'metro %' OR LOWER(poi.nombre) LIKE 'estación metro%')
+        AND poi.geog IS NOT NULL
+        AND ST_DWithin(
+            p.geometria::geography,
+            poi.geog,
+            :dist_max
+        )
+    )
+""")
+
+_SQL_CERCANIA_TIPO = text("""
+    SELECT DISTINCT p.id
+    FROM propiedades p
+    WHERE p.id = ANY(:prop_ids)
+    AND p.geometria IS NOT NULL
+    AND EXISTS (
+        SELECT 1 FROM puntos_interes poi
+        WHERE poi.tipo = :tipo_poi
+        AND poi.geog IS NOT NULL
+        AND ST_DWithin(
+            p.geometria::geography,
+            poi.geog,
+            :dist_max
+        )
+    )
+""")
+
+
 class RecommendationMLService:
     """Servicio avanzado de recomendaciones con Machine Learning y modelo LightGBM de satisfacción"""
     
-    def __init__(self, db: Session):
-        self.db = db
-        self.comunas_map = self._cargar_comunas()
+    def __init__(self):
+        # Mapa id -> nombre de comunas (datos de referencia): se carga en la primera
+        # solicitud y se recarga cada CACHE_TTL_COMUNAS segundos
+        self.comunas_map: Optional[Dict[int, str]] = None
+        self._comunas_expira = 0.0
         self.modelo_version = "v3.0_LightGBM_Satisfaccion"
         
         # Inicializar servicio de satisfacción
@@ -44,7 +132,7 @@ class RecommendationMLService:
                 self.satisfaccion_service = get_satisfaccion_service()
                 logger.info("✅ Modelo LightGBM de satisfacción integrado (R²=0.86)")
             except Exception as e:
-                logger.warning(f"⚠️ No se pudo cargar modelo de satisfacción: {e}")
+                logger.warning("⚠️ No se pudo cargar modelo de satisfacción: {}", e)
     
     def _normalizar_precio_a_clp(self, precio: float, divisa: str) -> float:
         """Normaliza cualquier precio a CLP
@@ -72,9 +160,9 @@ class RecommendationMLService:
         # Para valores grandes, asumir que ya están en CLP
         return precio
     
-    def _cargar_comunas(self) -> Dict[int, str]:
+    def _cargar_comunas(self, db: Session) -> Dict[int, str]:
         """Carga mapa de IDs a nombres de comunas"""
-        comunas = self.db.query(Comuna).all()
+        comunas = db.query(Comuna.id, Comuna.nombre).all()
         return {comuna.id: comuna.nombre for comuna in comunas}
     
     def _calcular_distancia_haversine(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -92,11 +180,12 @@ class RecommendationMLService:
         
         return R * c
     
-    def _calcular_distancia_minima_poi(self, lat: float, lon: float, tipo_poi: str) -> Optional[float]:
+    def _calcular_distancia_minima_poi(self, db: Session, lat: float, lon: float, tipo_poi: str) -> Optional[float]:
         """
         Calcula la distancia mínima de un punto a los POIs de un tipo específico
         
         Args:
+            db: Sesión de base de datos
             lat: Latitud de la propiedad
             lon: Longitud de la propiedad
             tipo_poi: Tipo de POI ('metro', 'colegio', 'universidad', 'centro_medico', etc.)
@@ -107,43 +196,24 @@ class RecommendationMLService:
         try:
             # Para metro, buscar tanto por tipo como por nombre (estaciones de metro)
             if tipo_poi == 'metro':
-                result = self.db.execute(text("""
-                    SELECT MIN(
-                        ST_Distance(
-                            geometria::geography,
-                            ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography
-                        )
-                    ) as distancia_min
-                    FROM puntos_interes
-                    WHERE (tipo = 'metro' OR LOWER(nombre) LIKE 'metro %' OR LOWER(nombre) LIKE 'estación metro%')
-                    AND geometria IS NOT NULL
-                """), {'lat': lat, 'lon': lon}).fetchone()
+                result = db.execute(_SQL_DISTANCIA_MIN_METRO, {'lat': lat, 'lon': lon}).fetchone()
             else:
                 # Buscar POIs cercanos del tipo especificado usando PostGIS
-                result = self.db.execute(text("""
-                    SELECT MIN(
-                        ST_Distance(
-                            geometria::geography,
-                            ST_SetSRID(ST_MakePoint(:lon, :lat), 4326)::geography
-                        )
-                    ) as distancia_min
-                    FROM puntos_interes
-                    WHERE tipo = :tipo
-                    AND geometria IS NOT NULL
-                """), {'lat': lat, 'lon': lon, 'tipo': tipo_poi}).fetchone()
+                result = db.execute(_SQL_DISTANCIA_MIN_TIPO, {'lat': lat, 'lon': lon, 'tipo': tipo_poi}).fetchone()
             
             if result and result[0] is not None:
                 return float(result[0])
             return None
         except Exception as e:
-            logger.debug(f"Error calculando distancia a {tipo_poi}: {e}")
+            logger.debug("Error calculando distancia a {}: {}", tipo_poi, e)
             return None
     
-    def _enriquecer_propiedad_con_distancias(self, prop: Propiedad, pref: PreferenciasDetalladas) -> Dict[str, Optional[float]]:
+    def _enriquecer_propiedad_con_distancias(self, db: Session, prop: Propiedad, pref: PreferenciasDetalladas) -> Dict[str, Optional[float]]:
         """
         Calcula las distancias de una propiedad a los POIs relevantes según las preferencias
         
         Args:
+            db: Sesión de base de datos
             prop: Propiedad a enriquecer
             pref: Preferencias del usuario
             
@@ -158,43 +228,43 @@ class RecommendationMLService:
         # Calcular distancia al metro si se pide transporte
         if pref.transporte and pref.transporte.importancia_metro != 0:
             distancias['metro'] = self._calcular_distancia_minima_poi(
-                prop.latitud, prop.longitud, 'metro'
+                db, prop.latitud, prop.longitud, 'metro'
             )
         
         # Calcular distancia a colegios si se pide educación
         if pref.educacion and pref.educacion.importancia_colegios != 0:
             distancias['colegio'] = self._calcular_distancia_minima_poi(
-                prop.latitud, prop.longitud, 'colegio'
+                db, prop.latitud, prop.longitud, 'colegio'
             )
         
         # Calcular distancia a universidades si se pide
         if pref.educacion and pref.educacion.importancia_universidades != 0:
             distancias['universidad'] = self._calcular_distancia_minima_poi(
-                prop.latitud, prop.longitud, 'universidad'
+                db, prop.latitud, prop.longitud, 'universidad'
             )
         
         # Calcular distancia a centros médicos si se pide salud
         if pref.salud and pref.salud.importancia_hospitales != 0:
             distancias['centro_medico'] = self._calcular_distancia_minima_poi(
-                prop.latitud, prop.longitud, 'centro_medico'
+                db, prop.latitud, prop.longitud, 'centro_medico'
             )
         
         # Calcular distancia a farmacias si se pide
         if pref.salud and pref.salud.importancia_farmacias != 0:
             distancias['farmacia'] = self._calcular_distancia_minima_poi(
-                prop.latitud, prop.longitud, 'farmacia'
+                db, prop.latitud, prop.longitud, 'farmacia'
             )
         
         # Calcular distancia a supermercados si se pide servicios
         if pref.servicios and pref.servicios.importancia_supermercados != 0:
             distancias['supermercado'] = self._calcular_distancia_minima_poi(
-                prop.latitud, prop.longitud, 'supermercado'
+                db, prop.latitud, prop.longitud, 'supermercado'
             )
         
         # Calcular distancia a parques si se pide áreas verdes
         if pref.areas_verdes and pref.areas_verdes.importancia_parques != 0:
             distancias['parque'] = self._calcular_distancia_minima_poi(
-                prop.latitud, prop.longitud, 'parque'
+                db, prop.latitud, prop.longitud, 'parque'
             )
         
         return distancias
@@ -202,7 +272,9 @@ class RecommendationMLService:
     def recomendar_propiedades(
         self,
         preferencias: PreferenciasDetalladas,
-        limit: int = 10
+        limit: int = 10,
+        *,
+        db: Session
     ) -> RecomendacionesResponseML:
         """
         Recomienda propiedades usando sistema avanzado con ML
@@ -210,12 +282,17 @@ class RecommendationMLService:
         Args:
             preferencias: Preferencias detalladas del usuario
             limit: Número máximo de recomendaciones
+            db: Sesión de base de datos de la solicitud
             
         Returns:
             RecomendacionesResponseML con recomendaciones y metadata
         """
+        if self.comunas_map is None or time.monotonic() >= self._comunas_expira:
+            self.comunas_map = self._cargar_comunas(db)
+            self._comunas_expira = time.monotonic() + settings.CACHE_TTL_COMUNAS
+        
         # 1. Filtrado (hard constraints)
-        propiedades_candidatas = self._filtrar_propiedades(preferencias)
+        propiedades_candidatas = self._filtrar_propiedades(db, preferencias)
         total_analizadas = len(propiedades_candidatas)
         
         # Determinar si necesitamos calcular distancias (si hay preferencias de POI)
@@ -234,13 +311,13 @@ class RecommendationMLService:
                 # Calcular distancias a POIs si es necesario
                 distancias_calculadas = None
                 if necesita_distancias:
-                    distancias_calculadas = self._enriquecer_propiedad_con_distancias(propiedad, preferencias)
+                    distancias_calculadas = self._enriquecer_propiedad_con_distancias(db, propiedad, preferencias)
                 
                 resultado_ml = self._calcular_score_ml(propiedad, preferencias, distancias_calculadas)
                 if resultado_ml['score_total'] > 0:  # Solo incluir con score positivo
                     propiedades_con_score.append(resultado_ml)
             except Exception as e:
-                logger.debug(f"Error scoring propiedad {propiedad.id}: {e}")
+                logger.debug("Error scoring propiedad {}: {}", propiedad.id, e)
                 continue
         
         # 3. Ordenar por score descendente
@@ -280,7 +357,7 @@ class RecommendationMLService:
                         elif satisfaccion_data['satisfaccion'] < 4:
                             resultado['puntos_debiles'].insert(0, f"Satisfacción ML baja: {satisfaccion_data['satisfaccion']:.1f}/10")
                 except Exception as e:
-                    logger.debug(f"Error satisfacción para {resultado['propiedad'].id}: {e}")
+                    logger.debug("Error satisfacción para {}: {}", resultado['propiedad'].id, e)
         
         # 6. Re-ordenar con satisfacción incluida
         candidatas_top.sort(key=lambda x: x['score_total'], reverse=True)
@@ -325,7 +402,7 @@ class RecommendationMLService:
                 resumen_explicacion=resultado['resumen'],
                 puntos_fuertes=resultado['puntos_fuertes'],
                 puntos_debiles=resultado['puntos_debiles'],
-                distancias=resultado['distancias']
+                distancias=self._distancias_respuesta(prop, preferencias)
             )
             recomendaciones.append(recomendacion)
         
@@ -340,14 +417,14 @@ class RecommendationMLService:
             total_encontradas=len(recomendaciones),
             total_analizadas=total_analizadas,
             recomendaciones=recomendaciones,
-            preferencias_aplicadas=preferencias.dict(exclude_none=True),
+            preferencias_aplicadas=preferencias.model_dump(exclude_none=True),
             modelo_version=self.modelo_version,
             sugerencias=sugerencias
         )
     
-    def _filtrar_propiedades(self, pref: PreferenciasDetalladas) -> List[Propiedad]:
+    def _filtrar_propiedades(self, db: Session, pref: PreferenciasDetalladas) -> List[Propiedad]:
         """Aplica hard constraints (filtros obligatorios)"""
-        query = self.db.query(Propiedad)
+        query = db.query(Propiedad)
         
         # Filtro básico: solo propiedades con coordenadas válidas
         query = query.filter(
@@ -420,38 +497,39 @@ class RecommendationMLService:
         if pref.transporte and pref.transporte.importancia_metro >= 7:
             dist_max = pref.transporte.distancia_maxima_metro_m
             propiedades_filtradas = self._filtrar_por_cercania_poi(
-                propiedades_filtradas, 'metro', dist_max
+                db, propiedades_filtradas, 'metro', dist_max
             )
-            logger.info(f"🚇 Filtro metro (dist_max={dist_max}m): {len(propiedades_filtradas)} propiedades")
+            logger.debug("🚇 Filtro metro (dist_max={}m): {} propiedades", dist_max, len(propiedades_filtradas))
         
         # Filtro por cercanía a colegios (si importancia >= 7)
         if pref.educacion and pref.educacion.importancia_colegios >= 7:
             dist_max = pref.educacion.distancia_maxima_colegios_m
             propiedades_filtradas = self._filtrar_por_cercania_poi(
-                propiedades_filtradas, 'colegio', dist_max
+                db, propiedades_filtradas, 'colegio', dist_max
             )
-            logger.info(f"🏫 Filtro colegios (dist_max={dist_max}m): {len(propiedades_filtradas)} propiedades")
+            logger.debug("🏫 Filtro colegios (dist_max={}m): {} propiedades", dist_max, len(propiedades_filtradas))
         
         # Filtro por cercanía a centros médicos (si importancia >= 7)
         if pref.salud and pref.salud.importancia_hospitales >= 7:
             dist_max = pref.salud.distancia_maxima_hospitales_m
             propiedades_filtradas = self._filtrar_por_cercania_poi(
-                propiedades_filtradas, 'centro_medico', dist_max
+                db, propiedades_filtradas, 'centro_medico', dist_max
             )
-            logger.info(f"🏥 Filtro centros médicos (dist_max={dist_max}m): {len(propiedades_filtradas)} propiedades")
+            logger.debug("🏥 Filtro centros médicos (dist_max={}m): {} propiedades", dist_max, len(propiedades_filtradas))
         
         # Filtro por cercanía a supermercados (si importancia >= 7)
         if pref.servicios and pref.servicios.importancia_supermercados >= 7:
             dist_max = pref.servicios.distancia_maxima_supermercados_m
             propiedades_filtradas = self._filtrar_por_cercania_poi(
-                propiedades_filtradas, 'supermercado', dist_max
+                db, propiedades_filtradas, 'supermercado', dist_max
             )
-            logger.info(f"🛒 Filtro supermercados (dist_max={dist_max}m): {len(propiedades_filtradas)} propiedades")
+            logger.debug("🛒 Filtro supermercados (dist_max={}m): {} propiedades", dist_max, len(propiedades_filtradas))
         
         return propiedades_filtradas
     
     def _filtrar_por_cercania_poi(
         self, 
+        db: Session,
         propiedades: List[Propiedad], 
         tipo_poi: str, 
         dist_max_m: float
@@ -460,6 +538,7 @@ class RecommendationMLService:
         Filtra propiedades que estén cerca de POIs de un tipo específico
         
         Args:
+            db: Sesión de base de datos
             propiedades: Lista de propiedades a filtrar
             tipo_poi: Tipo de POI ('metro', 'colegio', 'centro_medico', etc.)
             dist_max_m: Distancia máxima en metros
@@ -476,42 +555,12 @@ class RecommendationMLService:
         try:
             # Para metro, buscar también por nombre
             if tipo_poi == 'metro':
-                result = self.db.execute(text("""
-                    SELECT DISTINCT p.id
-                    FROM propiedades p
-                    WHERE p.id = ANY(:prop_ids)
-                    AND p.geometria IS NOT NULL
-                    AND EXISTS (
-                        SELECT 1 FROM puntos_interes poi
-                        WHERE (poi.tipo = 'metro' OR LOWER(poi.nombre) LIKE 'metro %' OR LOWER(poi.nombre) LIKE 'estación metro%')
-                        AND poi.geometria IS NOT NULL
-                        AND ST_DWithin(
-                            p.geometria::geography,
-                            poi.geometria::geography,
-                            :dist_max
-                        )
-                    )
-                """), {
+                result = db.execute(_SQL_CERCANIA_METRO, {
                     'prop_ids': prop_ids,
                     'dist_max': dist_max_m
                 }).fetchall()
             else:
-                result = self.db.execute(text("""
-                    SELECT DISTINCT p.id
-                    FROM propiedades p
-                    WHERE p.id = ANY(:prop_ids)
-                    AND p.geometria IS NOT NULL
-                    AND EXISTS (
-                        SELECT 1 FROM puntos_interes poi
-                        WHERE poi.tipo = :tipo_poi
-                        AND poi.geometria IS NOT NULL
-                        AND ST_DWithin(
-                            p.geometria::geography,
-                            poi.geometria::geography,
-                            :dist_max
-                        )
-                    )
-                """), {
+                result = db.execute(_SQL_CERCANIA_TIPO, {
                     'prop_ids': prop_ids,
                     'tipo_poi': tipo_poi,
                     'dist_max': dist_max_m
@@ -521,9 +570,23 @@ class RecommendationMLService:
             return [p for p in propiedades if p.id in ids_filtrados]
             
         except Exception as e:
-            logger.warning(f"Error en filtro espacial para {tipo_poi}: {e}")
+            logger.warning("Error en filtro espacial para {}: {}", tipo_poi, e)
             return propiedades
     
+    def _distancias_respuesta(self, prop: Propiedad, pref: PreferenciasDetalladas) -> Dict[str, float]:
+        """
+        Distancias a servicios clave para una recomendación final
+        
+        Solo incluye las categorías que el usuario especificó y con dato disponible
+        (las distancias calculadas en el scoring quedan en los atributos de la propiedad).
+        """
+        distancias = {}
+        for clave, categoria, atributo in _DISTANCIAS_RESPUESTA:
+            valor = getattr(prop, atributo)
+            if valor and getattr(pref, categoria) is not None:
+                distancias[clave] = round(valor, 1)
+        return distancias
+    
     def _calcular_score_ml(
         self, 
         prop: Propiedad, 
@@ -544,7 +607,6 @@ class RecommendationMLService:
         scores_categorias = []
         puntos_fuertes = []
         puntos_debiles = []
-        distancias = {}
         
         # Usar distancias calculadas si están disponibles
         dist_calc = distancias_calculadas or {}
@@ -618,7 +680,6 @@ class RecommendationMLService:
                 factores_negativos=score_transporte_data['negativos']
             ))
             if prop.dist_transporte_metro_m:
-                distancias['metro_m'] = round(prop.dist_transporte_metro_m, 1)
                 if score_transporte_data['score'] >= 70:
                     puntos_fuertes.append(f"Metro a {int(prop.dist_transporte_metro_m)}m")
                 elif score_transporte_data['score'] < 40:
@@ -637,7 +698,6 @@ class RecommendationMLService:
                 factores_negativos=score_educacion_data['negativos']
             ))
             if prop.dist_educacion_min_m:
-                distancias['colegio_m'] = round(prop.dist_educacion_min_m, 1)
                 # Si el usuario EVITA colegios y están lejos, es POSITIVO
                 if pref.educacion.importancia_colegios < 0:
                     if prop.dist_educacion_min_m > 500:
@@ -659,7 +719,6 @@ class RecommendationMLService:
                 factores_negativos=score_salud_data['negativos']
             ))
             if prop.dist_salud_min_m:
-                distancias['salud_m'] = round(prop.dist_salud_min_m, 1)
                 if score_salud_data['score'] >= 70:
                     puntos_fuertes.append(f"Centro de salud a {int(prop.dist_salud_min_m)}m")
         
@@ -676,7 +735,6 @@ class RecommendationMLService:
                 factores_negativos=score_verdes_data['negativos']
             ))
             if prop.dist_areas_verdes_m:
-                distancias['parque_m'] = round(prop.dist_areas_verdes_m, 1)
                 if score_verdes_data['score'] >= 70:
                     puntos_fuertes.append(f"Parque a {int(prop.dist_areas_verdes_m)}m")
         
@@ -703,7 +761,7 @@ class RecommendationMLService:
         # Esto optimiza el rendimiento evitando calcular ML para todas las propiedades
         
         # ===== CALCULAR SCORE TOTAL (sin satisfacción, se agrega después) =====
-        score_total = sum(sc.contribucion for sc in scores_categorias)
+        score_total = sum(sc['contribucion'] for sc in scores_categorias)
         
         # Calcular confianza (basado en disponibilidad de datos)
         campos_disponibles = 0
@@ -736,8 +794,7 @@ class RecommendationMLService:
             'scores_categorias': scores_categorias,
             'resumen': resumen,
             'puntos_fuertes': puntos_fuertes,
-            'puntos_debiles': puntos_debiles,
-            'distancias': distancias
+            'puntos_debiles': puntos_debiles
         }
     
     def _score_precio(self, prop: Propiedad, pref: PreferenciasDetalladas) -> Dict:
@@ -1274,7 +1331,7 @@ class RecommendationMLService:
             return resultado
             
         except Exception as e:
-            logger.debug(f"Error prediciendo satisfacción para prop {prop.id}: {e}")
+            logger.debug("Error prediciendo satisfacción para prop {}: {}", prop.id, e)
             return None
     
     def _generar_sugerencias(
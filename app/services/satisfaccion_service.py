@@ -15,7 +15,6 @@ Fecha: Enero 2025
 """
 import pickle
 import numpy as np
-import pandas as pd
 from pathlib import Path
 from typing import Dict, Optional, List, Tuple
 from loguru import logger
@@ -57,6 +56,19 @@ class SatisfaccionService:
     # Comunas válidas
     COMUNAS_VALIDAS = ['Estación Central', 'La Reina', 'Ñuñoa', 'Santiago']
     
+    # Interpretación por tramos de 2 puntos (índice = int(satisfaccion) // 2):
+    # < 4 Bajo, 4-6 Regular, 6-8 Bueno, >= 8 Excelente
+    _BAJO = ("Bajo", "❌", "Propiedad con características por debajo del promedio")
+    _EXCELENTE = ("Excelente", "🌟", "Propiedad con características excepcionales")
+    NIVELES_SATISFACCION = (
+        _BAJO,
+        _BAJO,
+        ("Regular", "⚠️", "Propiedad con características promedio"),
+        ("Bueno", "✅", "Propiedad con buenas características"),
+        _EXCELENTE,
+        _EXCELENTE,
+    )
+    
     def __init__(self, modelo_path: Optional[Path] = None):
         """
         Inicializa el servicio cargando el modelo entrenado.
@@ -108,10 +120,23 @@ class SatisfaccionService:
             if self.modelo is None:
                 raise ValueError("El archivo pickle no contiene un modelo válido")
             
+            # Índice de cada feature en el vector del modelo (para llenar por posición)
+            self._col_idx = {nombre: i for i, nombre in enumerate(self.features)}
+            
+            # Vector inicial (1, n) por comuna, con su one-hot ya marcado
+            self._vector_sin_comuna = np.zeros((1, len(self.features)))
+            self._vector_por_comuna = {}
+            for comuna in self.COMUNAS_VALIDAS:
+                vector = self._vector_sin_comuna.copy()
+                j = self._col_idx.get(f'comuna_{comuna}')
+                if j is not None:
+                    vector[0, j] = 1
+                self._vector_por_comuna[comuna] = vector
+            
             logger.info(f"✅ Modelo cargado: {type(self.modelo).__name__}")
             
         except Exception as e:
-            logger.error(f"❌ Error cargando modelo: {e}")
+            logger.error("❌ Error cargando modelo: {}", e)
             raise
     
     def _calcular_features_derivadas(
@@ -155,10 +180,13 @@ class SatisfaccionService:
         tipo_propiedad: str,
         distancias: Optional[Dict[str, float]] = None,
         **kwargs
-    ) -> pd.DataFrame:
+    ) -> np.ndarray:
         """
         Prepara el vector de features para el modelo.
         
+        Escribe cada valor directamente en su posición de una matriz (1, n)
+        en el orden del modelo, sin construir un DataFrame de una fila.
+        
         Args:
             superficie_util: Superficie útil en m²
             dormitorios: Número de dormitorios
@@ -170,15 +198,15 @@ class SatisfaccionService:
             **kwargs: Features adicionales
         
         Returns:
-            DataFrame con las features preparadas
+            Matriz (1, n_features) con las features preparadas
         """
         # Calcular features derivadas
         derivadas = self._calcular_features_derivadas(
             superficie_util, dormitorios, banos, precio_uf
         )
         
-        # Construir diccionario de features
-        feature_dict = {
+        tipo = tipo_propiedad.lower()
+        valores = {
             # Features básicas
             'superficie_util': superficie_util,
             'dormitorios': dormitorios,
@@ -189,35 +217,32 @@ class SatisfaccionService:
             **derivadas,
             
             # Tipo de propiedad
-            'es_departamento': 1 if tipo_propiedad.lower() == 'departamento' else 0,
-            'es_casa': 1 if tipo_propiedad.lower() == 'casa' else 0,
-            
-            # Comunas (one-hot encoding)
-            'comuna_Estación Central': 1 if comuna == 'Estación Central' else 0,
-            'comuna_La Reina': 1 if comuna == 'La Reina' else 0,
-            'comuna_Ñuñoa': 1 if comuna == 'Ñuñoa' else 0,
-            'comuna_Santiago': 1 if comuna == 'Santiago' else 0,
+            'es_departamento': tipo == 'departamento',
+            'es_casa': tipo == 'casa',
         }
         
-        # Agregar distancias
+        # Agregar distancias (normalizando el nombre de la feature)
         if distancias:
             for key, value in distancias.items():
-                # Normalizar nombre de feature
-                feat_name = key if key.startswith('dist_') else f'dist_{key}'
-                feature_dict[feat_name] = value
+                valores[key if key.startswith('dist_') else f'dist_{key}'] = value
         
         # Agregar kwargs adicionales
-        feature_dict.update(kwargs)
+        valores.update(kwargs)
         
-        # Crear DataFrame con las features en el orden correcto
-        X = pd.DataFrame([{feat: feature_dict.get(feat, 0) for feat in self.features}])
+        # Partir del vector precalculado de la comuna (one-hot ya marcado);
+        # features no informadas (o nulas) quedan en 0
+        X = self._vector_por_comuna.get(comuna, self._vector_sin_comuna).copy()
+        for nombre, valor in valores.items():
+            j = self._col_idx.get(nombre)
+            if j is not None and valor is not None:
+                X[0, j] = valor
         
         # Rellenar NaN con 0
-        X = X.fillna(0)
+        X[np.isnan(X)] = 0
         
         return X
     
-    def _interpretar_satisfaccion(self, satisfaccion: float) -> Tuple[str, str, str]:
+    def interpretar_satisfaccion(self, satisfaccion: float) -> Tuple[str, str, str]:
         """
         Interpreta el nivel de satisfacción.
         
@@ -227,14 +252,8 @@ class SatisfaccionService:
         Returns:
             Tupla (nivel, emoji, descripcion)
         """
-        if satisfaccion >= 8:
-            return "Excelente", "🌟", "Propiedad con características excepcionales"
-        elif satisfaccion >= 6:
-            return "Bueno", "✅", "Propiedad con buenas características"
-        elif satisfaccion >= 4:
-            return "Regular", "⚠️", "Propiedad con características promedio"
-        else:
-            return "Bajo", "❌", "Propiedad con características por debajo del promedio"
+        tramo = min(max(int(satisfaccion) // 2, 0), 5)
+        return self.NIVELES_SATISFACCION[tramo]
     
     def predecir_satisfaccion(
         self,
@@ -287,7 +306,7 @@ class SatisfaccionService:
             
             # Normalizar comuna
             if comuna not in self.COMUNAS_VALIDAS:
-                logger.warning(f"Comuna '{comuna}' no reconocida, usando 'Santiago'")
+                logger.warning("Comuna '{}' no reconocida, usando 'Santiago'", comuna)
                 comuna = "Santiago"
             
             # Preparar features
@@ -312,7 +331,7 @@ class SatisfaccionService:
             satisfaccion = float(np.clip(satisfaccion_raw, 0, 10))
             
             # Interpretar
-            nivel, emoji, descripcion = self._interpretar_satisfaccion(satisfaccion)
+            nivel, emoji, descripcion = self.interpretar_satisfaccion(satisfaccion)
             
             # Calcular features derivadas para respuesta
             derivadas = self._calcular_features_derivadas(
@@ -339,51 +358,99 @@ class SatisfaccionService:
             }
             
         except Exception as e:
-            logger.error(f"❌ Error en predicción: {e}")
+            logger.error("❌ Error en predicción: {}", e)
             raise
     
-    def comparar_propiedades(self, propiedades: List[Dict]) -> pd.DataFrame:
+    def predecir_satisfaccion_matriz(
+        self,
+        base: np.ndarray,
+        comunas: np.ndarray,
+        tipos: np.ndarray
+    ) -> np.ndarray:
         """
-        Compara múltiples propiedades y genera un ranking.
+        Predice la satisfacción de varias propiedades a partir de arrays ya validados.
         
         Args:
-            propiedades: Lista de dicts con características de cada propiedad.
-                        Cada dict debe tener al menos:
-                        superficie_util, dormitorios, banos, precio_uf
+            base: Matriz (n, 4) con superficie_util, dormitorios, banos, precio_uf
+            comunas: Array de n comunas
+            tipos: Array de n tipos de propiedad
         
         Returns:
-            DataFrame con ranking ordenado por satisfacción
+            Array de n satisfacciones (0-10)
         """
-        resultados = []
+        sup, dorms, banos, precio = base.T
+        dorms_safe = np.maximum(dorms, 1)
+        comunas = np.where(np.isin(comunas, self.COMUNAS_VALIDAS), comunas, 'Santiago')
+        tipos = np.char.lower(tipos.astype(str))
         
-        for i, prop in enumerate(propiedades):
-            try:
-                pred = self.predecir_satisfaccion(**prop)
-                resultados.append({
-                    'id': prop.get('id', i + 1),
-                    'direccion': prop.get('direccion', f'Propiedad {i + 1}'),
-                    'satisfaccion': pred['satisfaccion'],
-                    'nivel': pred['nivel'],
-                    'emoji': pred['emoji'],
-                    'precio_uf': prop.get('precio_uf', 0),
-                    'superficie': prop.get('superficie_util', 0),
-                    'dormitorios': prop.get('dormitorios', 0),
-                    'banos': prop.get('banos', 0),
-                    'comuna': prop.get('comuna', 'N/A'),
-                    'tipo': prop.get('tipo_propiedad', 'N/A'),
-                })
-            except Exception as e:
-                logger.warning(f"Error procesando propiedad {i}: {e}")
-                continue
+        columnas = {
+            'superficie_util': sup,
+            'dormitorios': dorms,
+            'banos': banos,
+            'precio_uf': precio,
+            'precio_m2_uf': precio / np.maximum(sup, 1),
+            'm2_por_dormitorio': sup / dorms_safe,
+            'm2_por_habitante': sup / (dorms_safe * 2),
+            'ratio_bano_dorm': banos / dorms_safe,
+            'total_habitaciones': dorms + banos,
+            'es_departamento': tipos == 'departamento',
+            'es_casa': tipos == 'casa',
+        }
+        for comuna in self.COMUNAS_VALIDAS:
+            columnas[f'comuna_{comuna}'] = comunas == comuna
         
-        if not resultados:
-            return pd.DataFrame()
+        # Matriz en el orden del modelo; features no disponibles (distancias) quedan en 0
+        X = np.zeros((len(base), len(self.features)))
+        for j, nombre in enumerate(self.features):
+            columna = columnas.get(nombre)
+            if columna is not None:
+                X[:, j] = columna
+        
+        return np.clip(self.modelo.predict(self.scaler.transform(X)), 0, 10)
+    
+    def comparar_propiedades(
+        self,
+        base: np.ndarray,
+        comunas: np.ndarray,
+        tipos: np.ndarray
+    ) -> List[Dict]:
+        """
+        Compara múltiples propiedades y genera un ranking.
         
-        df = pd.DataFrame(resultados)
-        df = df.sort_values('satisfaccion', ascending=False)
-        df['ranking'] = range(1, len(df) + 1)
+        Usa `predecir_satisfaccion_matriz` (una sola llamada al modelo).
         
-        return df
+        Args:
+            base: Matriz (n, 4) con superficie_util, dormitorios, banos, precio_uf
+            comunas: Array de n comunas
+            tipos: Array de n tipos de propiedad
+        
+        Returns:
+            Lista de dicts (forma de PropiedadRanking) ordenada por satisfacción
+        """
+        satisfacciones = np.round(self.predecir_satisfaccion_matriz(base, comunas, tipos), 2)
+        orden = np.argsort(-satisfacciones, kind='stable')
+        
+        ranking = []
+        for posicion, i in enumerate(orden.tolist(), start=1):
+            satisfaccion = float(satisfacciones[i])
+            nivel, emoji, _ = self.interpretar_satisfaccion(satisfaccion)
+            superficie, dormitorios, banos, precio_uf = base[i].tolist()
+            ranking.append({
+                'ranking': posicion,
+                'id': i + 1,
+                'direccion': f'Propiedad {i + 1}',
+                'satisfaccion': satisfaccion,
+                'nivel': nivel,
+                'emoji': emoji,
+                'precio_uf': precio_uf,
+                'superficie': superficie,
+                'dormitorios': int(dormitorios),
+                'banos': int(banos),
+                'comuna': comunas[i],
+                'tipo': tipos[i]
+            })
+        
+        return ranking
     
     def get_info(self) -> Dict:
         """
@@ -426,21 +493,21 @@ def get_satisfaccion_service() -> Optional[SatisfaccionService]:
         try:
             _satisfaccion_service = SatisfaccionService()
         except Exception as e:
-            logger.error(f"❌ No se pudo inicializar SatisfaccionService: {e}")
+            logger.error("❌ No se pudo inicializar SatisfaccionService: {}", e)
             return None
     
     return _satisfaccion_service
 
 
-# Para inicialización automática al importar
 def inicializar_servicio():
-    """Intenta inicializar el servicio de satisfacción"""
+    """
+    Intenta inicializar el servicio de satisfacción (silencioso si falla)
+    
+    El modelo ya no se carga al importar el módulo: se carga en el primer
+    `get_satisfaccion_service()` (la API lo hace al arrancar).
+    """
     try:
         return get_satisfaccion_service()
     except Exception as e:
-        logger.warning(f"Servicio de satisfacción no disponible: {e}")
+        logger.warning("Servicio de satisfacción no disponible: {}", e)
         return None
-
-
-# Inicializar al importar (silencioso si falla)
-satisfaccion_service = inicializar_servicio()
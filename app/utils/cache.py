@@ -0,0 +1,202 @@
+"""
+Caché cache-aside sobre Redis
+Si Redis no está instalado o REDIS_URL no está configurado, el caché queda desactivado
+y los endpoints consultan directamente la base de datos.
+
+Incluye además un LRU en memoria del proceso para respuestas muy repetidas.
+"""
+import functools
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+import orjson
+from fastapi import Request, Response
+from loguru import logger
+
+from app.config import settings
+
+# Intentar importar Redis (dependencia opcional)
+try:
+    from redis import asyncio as redis
+    REDIS_DISPONIBLE = True
+except ImportError:
+    REDIS_DISPONIBLE = False
+    logger.warning("⚠️ Redis no instalado. Caché desactivado (pip install redis)")
+
+
+# Claves de caché (versionadas para poder invalidar por despliegue)
+CACHE_KEY_COMUNAS = "v1:comunas:all"
+CACHE_KEY_COMUNA = "v1:comuna:{nombre}"
+CACHE_KEY_STATS = "v1:stats:general"
+
+_cliente: Optional["redis.Redis"] = None
+
+
+def get_redis() -> Optional["redis.Redis"]:
+    """
+    Obtiene el cliente Redis global (lazy)
+
+    Returns:
+        Cliente Redis o None si el caché está desactivado
+    """
+    global _cliente
+
+    if _cliente is None and REDIS_DISPONIBLE and settings.REDIS_URL:
+        _cliente = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=settings.REDIS_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_TIMEOUT
+        )
+
+    return _cliente
+
+
+async def cache_get(key: str) -> Optional[bytes]:
+    """Lee una clave del caché (None si no existe o Redis falla)"""
+    cliente = get_redis()
+    if cliente is None:
+        return None
+
+    try:
+        return await cliente.get(key)
+    except redis.RedisError as e:
+        logger.warning("⚠️ Error leyendo caché '{}': {}", key, e)
+        return None
+
+
+async def cache_set(key: str, value: bytes, ttl: int) -> None:
+    """Guarda una clave en el caché con expiración en segundos"""
+    cliente = get_redis()
+    if cliente is None:
+        return
+
+    try:
+        await cliente.set(key, value, ex=ttl)
+    except redis.RedisError as e:
+        logger.warning("⚠️ Error escribiendo caché '{}': {}", key, e)
+
+
+async def cache_delete(*keys: str) -> None:
+    """Invalida una o más claves del caché"""
+    cliente = get_redis()
+    if cliente is None or not keys:
+        return
+
+    try:
+        await cliente.delete(*keys)
+    except redis.RedisError as e:
+        logger.warning("⚠️ Error invalidando caché {}: {}", keys, e)
+
+
+def respuesta_json(
+    contenido: bytes,
+    request: Optional[Request] = None,
+    max_age: Optional[int] = None
+) -> Response:
+    """
+    Construye una respuesta JSON a partir de bytes ya serializados
+
+    Con `max_age` agrega `ETag` (hash del contenido) y `Cache-Control` para que
+    navegadores/proxies reutilicen la respuesta; si el cliente envía un
+    `If-None-Match` coincidente se responde `304 Not Modified` sin cuerpo.
+
+    Args:
+        contenido: Cuerpo JSON en bytes
+        request: Request entrante (para leer If-None-Match)
+        max_age: Segundos de caché HTTP (None = sin headers de caché)
+    """
+    if max_age is None:
+        return Response(content=contenido, media_type="application/json")
+
+    etag = f'"{hashlib.blake2b(contenido, digest_size=16).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+
+    if request is not None:
+        if_none_match = request.headers.get("if-none-match", "")
+        etags_cliente = {e.strip().removeprefix("W/") for e in if_none_match.split(",")}
+        if etag in etags_cliente or "*" in etags_cliente:
+            return Response(status_code=304, headers=headers)
+
+    return Response(content=contenido, media_type="application/json", headers=headers)
+
+
+def cache_json(key: str, ttl: int, max_age: Optional[int] = None) -> Callable:
+    """
+    Decorador cache-aside para endpoints `async def` que retornan datos serializables a JSON
+
+    La clave puede usar los parámetros del endpoint, ej: "v1:comuna:{nombre}".
+    Se cachean los bytes JSON ya serializados (orjson): en un hit se responden
+    tal cual sin ejecutar el endpoint ni volver a serializar; en un miss se
+    ejecuta el endpoint y se guarda su resultado con TTL.
+
+    Con `max_age` se agregan además headers de caché HTTP (ver `respuesta_json`);
+    para responder 304 el endpoint debe declarar un parámetro `request: Request`.
+
+    Args:
+        key: Plantilla de la clave de caché
+        ttl: Tiempo de vida en segundos
+        max_age: Segundos de caché HTTP (opcional)
+    """
+    def decorador(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs) -> Any:
+            cache_key = key.format(**kwargs)
+
+            contenido = await cache_get(cache_key)
+            if contenido is None:
+                resultado = await func(*args, **kwargs)
+                contenido = orjson.dumps(resultado)
+                await cache_set(cache_key, contenido, ttl)
+
+            return respuesta_json(contenido, kwargs.get("request"), max_age)
+
+        return wrapper
+
+    return decorador
+
+
+class LRUCache:
+    """
+    Caché LRU en memoria del proceso con expiración por TTL
+
+    Pensado para bytes JSON ya serializados de datos casi estáticos
+    (ej: puntos de interés); cada worker mantiene su propia copia.
+    Es seguro para usar desde el threadpool de endpoints `def`.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._datos: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """Retorna el valor si existe y no expiró (None en caso contrario)"""
+        with self._lock:
+            entrada = self._datos.get(key)
+            if entrada is None:
+                return None
+
+            expira, valor = entrada
+            if expira < time.monotonic():
+                del self._datos[key]
+                return None
+
+            self._datos.move_to_end(key)
+            return valor
+
+    def set(self, key: Hashable, value: bytes) -> None:
+        """Guarda un valor, descartando el menos usado si se excede maxsize"""
+        with self._lock:
+            self._datos[key] = (time.monotonic() + self.ttl, value)
+            self._datos.move_to_end(key)
+            if len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+
+    def clear(self) -> None:
+        """Invalida todo el contenido"""
+        with self._lock:
+            self._datos.clear()
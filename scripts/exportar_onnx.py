@@ -0,0 +1,47 @@
+"""
+Script para exportar los modelos GWRF por cluster a ONNX.
+
+Convierte cada Random Forest de `modelos/gwrf_por_cluster.pkl` a
+`modelos/gwrf_cluster_{id}.onnx`. Al iniciar, MLPrediccionService usa estos
+archivos con ONNX Runtime (si está instalado) en lugar de scikit-learn.
+
+Requiere: pip install skl2onnx onnxruntime
+
+Uso:
+    python scripts/exportar_onnx.py
+"""
+import sys
+from pathlib import Path
+
+import joblib
+from skl2onnx import convert_sklearn
+from skl2onnx.common.data_types import FloatTensorType
+
+MODELOS_DIR = Path(__file__).parent.parent / 'modelos'
+
+# superficie_util, dormitorios, banos, estacionamientos, bodegas,
+# 3 features derivadas y 42 densidades (ver MLPrediccionService)
+N_FEATURES = 50
+
+
+def main():
+    cluster_path = MODELOS_DIR / 'gwrf_por_cluster.pkl'
+    if not cluster_path.exists():
+        print(f"❌ No se encontró {cluster_path}")
+        sys.exit(1)
+
+    modelos = joblib.load(cluster_path).get('modelos', {})
+    print(f"📦 {len(modelos)} modelos por cluster")
+
+    for cluster_id, modelo in modelos.items():
+        onnx_model = convert_sklearn(
+            modelo,
+            initial_types=[('X', FloatTensorType([None, N_FEATURES]))]
+        )
+        salida = MODELOS_DIR / f'gwrf_cluster_{cluster_id}.onnx'
+        salida.write_bytes(onnx_model.SerializeToString())
+        print(f"✅ Cluster {cluster_id} -> {salida.name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+-- ============================================================================
+-- MIGRACIÓN: Columna geography indexada para puntos de interés
+-- ============================================================================
+-- Proyecto: GeoInformática
+-- Descripción: Agrega una columna geography generada a partir de `geometria`
+--              con índice GiST, para que ST_DWithin/ST_Distance (en metros)
+--              usen el índice en vez de castear cada fila en la consulta
+-- ============================================================================
+
+-- 1. Columna generada (se mantiene sola al insertar/actualizar geometria)
+ALTER TABLE puntos_interes
+ADD COLUMN IF NOT EXISTS geog geography(Point, 4326)
+GENERATED ALWAYS AS (geometria::geography) STORED;
+
+-- 2. Índice espacial sobre la columna geography
+CREATE INDEX IF NOT EXISTS idx_puntos_interes_geog
+ON puntos_interes USING GIST (geog);
+
+-- 3. Actualizar estadísticas del planner
+ANALYZE puntos_interes;
+
+-- 4. Verificación
+SELECT
+    COUNT(*) AS total_puntos,
+    COUNT(geog) AS puntos_con_geog
+FROM puntos_interes;
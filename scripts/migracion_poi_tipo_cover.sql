@@ -0,0 +1,22 @@
+-- ============================================================================
+-- MIGRACIÓN: Índice cubriente por tipo en puntos de interés
+-- ============================================================================
+-- Proyecto: GeoInformática
+-- Descripción: Reemplaza el índice simple sobre `tipo` por uno que incluye
+--              las columnas de /puntos-interes/tipo/{tipo}, para responder
+--              con index-only scan (sin visitar el heap)
+-- ============================================================================
+
+-- 1. Índice cubriente (Postgres 11+)
+CREATE INDEX IF NOT EXISTS idx_puntos_interes_tipo_cover
+ON puntos_interes (tipo)
+INCLUDE (id, nombre, latitud, longitud, direccion);
+
+-- 2. El índice simple sobre `tipo` queda redundante
+DROP INDEX IF EXISTS ix_puntos_interes_tipo;
+
+-- 3. Poblar el visibility map (requisito para index-only scans) y estadísticas
+VACUUM (ANALYZE) puntos_interes;
+
+-- NOTA: tras recargas masivas de POIs (scripts/cargar_servicios.py) volver a
+-- ejecutar VACUUM (ANALYZE) puntos_interes; autovacuum lo hará eventualmente.
@@ -0,0 +1,38 @@
+"""
+Script para re-guardar los modelos de precio con joblib.
+
+Los `.pkl` copiados desde Semana 3 fueron guardados con `pickle.dump`.
+Re-guardarlos con `joblib.dump` (sin compresión, protocolo 5) deja los arrays
+NumPy de los árboles en un formato que `joblib.load(..., mmap_mode='r')`
+puede mapear en memoria: carga casi instantánea y páginas compartidas entre
+workers.
+
+Uso:
+    python scripts/migrar_modelos_joblib.py
+"""
+import pickle
+from pathlib import Path
+
+import joblib
+
+MODELOS_DIR = Path(__file__).parent.parent / 'modelos'
+
+ARCHIVOS = ['gwrf_por_cluster.pkl', 'meta_model_stack.pkl']
+
+
+def main():
+    for nombre in ARCHIVOS:
+        path = MODELOS_DIR / nombre
+        if not path.exists():
+            print(f"⚠️  No se encontró {path}, se omite")
+            continue
+
+        with open(path, 'rb') as f:
+            datos = pickle.load(f)
+
+        joblib.dump(datos, path, compress=0, protocol=5)
+        print(f"✅ {nombre} re-guardado con joblib")
+
+
+if __name__ == '__main__':
+    main()